@@ -62,78 +62,22 @@ in register a?
 
 '''
 
-import re
-
+from aoc.vm import ISA, Machine, assemble
 from inputs import Input
 
-
-def reg(s):
-    return ord(s[0]) - ord('a')
-
-
-def icpy(regs, val, y):
-    regs[y] = val
-    return 1
-
-
-def cpy(regs, x, y):
-    regs[y] = regs[x]
-    return 1
-
-
-def inc(regs, a):
-    regs[a] += 1
-    return 1
-
-
-def dec(regs, a):
-    regs[a] -= 1
-    return 1
-
-
-def jnz(regs, a, count):
-    return count if regs[a] != 0 else 1
+ASSEMBUNNY = ISA('abcd', {
+    'cpy': ('vr', 'r[b] = r[a]'),
+    'inc': ('r', 'r[a] += 1'),
+    'dec': ('r', 'r[a] -= 1'),
+    'jnz': ('vi', 'if r[a]:\n    return ip + b')})
 
 
-def run(tape, regs=[0, 0, 0, 0]):
-    ip = 0
-    while ip < len(tape):
-        # print ip, tape[ip], regs
-        ip += tape[ip](regs)
-    return regs
+def run(program, regs=[0, 0, 0, 0]):
+    computer = Machine(program, registers=regs)
+    computer.run()
+    return computer.regs[:4]
 
 with Input(12) as f:
-    TAPE = []
-    for line in f:
-        line = line.strip()
-        m = re.match('cpy (-?\d+) ([a-d])', line)
-        if m:
-            TAPE.append(lambda x, val=int(m.group(1)),
-                        r=reg(m.group(2)): icpy(x, val, r))
-            continue
-        m = re.match('cpy ([a-d]) ([a-d])', line)
-        if m:
-            TAPE.append(lambda x, src=reg(m.group(1)),
-                        dest=reg(m.group(2)): cpy(x, src, dest))
-            continue
-        m = re.match('inc ([a-d])', line)
-        if m:
-            TAPE.append(lambda x, dest=reg(m.group(1)): inc(x, dest))
-            continue
-        m = re.match('dec ([a-d])', line)
-        if m:
-            TAPE.append(lambda x, dest=reg(m.group(1)): dec(x, dest))
-            continue
-        m = re.match('jnz ([a-d]) (-?\d+)', line)
-        if m:
-            TAPE.append(lambda x, r=reg(m.group(1)), count=int(m.group(2)):
-                        jnz(x, r, count))
-            continue
-        m = re.match('jnz (-?\d+) (-?\d+)', line)
-        if m:
-            TAPE.append(lambda x, val=int(m.group(1)), count=int(m.group(2)):
-                        count if val != 0 else 1)
-            continue
-        assert False, 'Unknown asm: ' + line
+    TAPE = assemble(ASSEMBUNNY, f.read())
     print(run(TAPE))
     print(run(TAPE, regs=[0, 0, 1, 0]))
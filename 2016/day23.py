@@ -96,136 +96,62 @@ do with it. Don't bunnies usually multiply?
 Anyway, what value should actually be sent to the safe?
 '''
 
-import re
-import signal
-
-cpy, inc, dec, jnz, tgl = 0, 1, 2, 3, 4
-inames = ['cpy', 'inc', 'dec', 'jnz', 'tgl']
-
-def val(s, regs):
-    if type(s) == int:
-        return s
-    return regs[s]
-
-
-def run(tape, regs={'a': 0, 'b': 0, 'c': 0, 'd': 0}, trace=False):
-    ip = 0
-    ic = 0
-
-    def handler(signum, frame):
-        print(ip, ic, inames[tape[ip][0]], tape[ip][1], regs)
-        signal.alarm(5)
-    signal.signal(signal.SIGALRM, handler)
-    signal.alarm(5)
-
-    while ip < len(tape):
-        ic += 1
-        if trace:
-            print(ip, ic, inames[tape[ip][0]], tape[ip][1], regs, '->', end=' ')
-        insn, args = tape[ip]
-        step = 1
-        if insn == cpy:
-            x, y = args
-            if y in regs:
-                regs[y] = val (x, regs)
-        elif insn == inc:
-            # Optimize multiply a*b:
-            # cpy b c
-            # inc a
-            # dec c
-            # jnz c -2
-            # dec d
-            # jnz d -5
-            if (args[0] in regs and
-                ip > 0 and ip + 4 < len(tape) and
-                tape[ip-1][0] == cpy and
-                tape[ip+1][0] == dec and tape[ip+1][1][0] == tape[ip-1][1][1] and
-                tape[ip+2][0] == jnz and tape[ip+2][1][0] == tape[ip-1][1][1] and
-                tape[ip+2][1][1] == -2 and
-                tape[ip+3][0] == dec and
-                tape[ip+4][0] == jnz and tape[ip+4][1][0] == tape[ip+3][1][0] and
-                tape[ip+4][1][1] == -5):
-                mult = (tape[ip-1][1][0], tape[ip+3][1][0])
-                # print 'mult', args[0], mult, tape[ip-1:ip+5], regs,
-                regs[args[0]] += (val (mult[0], regs) * val (mult[1], regs))
-                regs[tape[ip+1][1][0]] = 0
-                regs[tape[ip+3][1][0]] = 0
-                step = 5
-            elif args[0] in regs:
-                regs[args[0]] += 1
-        elif insn == dec:
-            if args[0] in regs:
-                regs[args[0]] -= 1
-        elif insn == jnz:
-            x, y = [val(s, regs) for s in args]
-            if x != 0:
-                step = y
-        elif insn == tgl:
-            x = val(args[0], regs)
-            # print 'tgl', args[0], x, regs
-            refip = ip + x
-            if refip >= 0 and refip < len (tape):
-                insn, args = tape[refip]
-                if len(args) == 1:
-                    if insn == inc:
-                        insn = dec
-                    else:
-                        insn = inc
-                else:
-                    if insn == jnz:
-                        insn = cpy
-                    else:
-                        insn = jnz
-                tape[refip] = (insn, args)
-        else:
-            assert False, 'Illegal instruction: %s' % insn
-        if trace:
-            print(regs, ip + step)
-        ip += step
-
-    signal.alarm(0)
-    return regs
-
-def read(fn):
-    tape = []
-    with open(fn) as f:
-        for line in [line.strip() for line in f.readlines()]:
-            m = re.match('cpy (-?\d+|[a-d]) ([a-d])', line)
-            if m:
-                x = m.group(1)
-                if not x.isalpha():
-                    x = int(x)
-                tape.append ((cpy, (x, m.group(2))))
-                continue
-            m = re.match('inc ([a-d])', line)
-            if m:
-                tape.append((inc, (m.group(1))))
-                continue
-            m = re.match('dec ([a-d])', line)
-            if m:
-                tape.append((dec, (m.group(1))))
-                continue
-            m = re.match('jnz (-?\d+|[a-d]) (-?\d+|[a-d])', line)
-            if m:
-                x, y = m.group (1, 2)
-                if not x.isalpha():
-                    x = int(x)
-                if not y.isalpha():
-                    y = int(y)
-                tape.append((jnz, (x, y)))
-                continue
-            m = re.match ('tgl (-?\d+|[a-d])', line)
-            if m:
-                x = m.group(1)
-                if not x.isalpha():
-                    x = int(x)
-                tape.append((tgl, (x)))
-                continue
-            assert False, 'Unknown asm: ' + line
-    return tape
-
-tape = read('23.txt')
-
-print(run(tape[:], regs={'a': 7, 'b': 0, 'c': 0, 'd': 0}, trace=False))
+from aoc.vm import ISA, Machine, assemble
+
+TOGGLED = {'inc': 'dec', 'dec': 'inc', 'tgl': 'inc', 'jnz': 'cpy', 'cpy': 'jnz'}
+
+
+def toggle(m, r, ip, a, b, c):
+    target = ip + r[a]
+    if 0 <= target < len(m.code):
+        m.patch(target, TOGGLED[m.mnemonic(target)])
+
+
+def inc(m, r, ip, a, b, c):
+    # Optimize multiply a*b:
+    # cpy b c
+    # inc a
+    # dec c
+    # jnz c -2
+    # dec d
+    # jnz d -5
+    if a < 0:
+        return
+    code = m.listing
+    if 0 < ip and ip + 4 < len(code):
+        cp, x, y, _ = code[ip - 1]
+        (d1, y1, _, _), (j1, y2, o1, _), (d2, z, _, _), (j2, z2, o2, _) = code[ip + 1:ip + 5]
+        if ((cp, d1, j1, d2, j2) == MULTIPLY and y >= 0 and z >= 0 and
+            y == y1 == y2 and o1 < 0 and r[o1] == -2 and
+            z == z2 and o2 < 0 and r[o2] == -5):
+            r[a] += r[x] * r[z]
+            r[y] = 0
+            r[z] = 0
+            return ip + 5
+    r[a] += 1
+
+
+ASSEMBUNNY = ISA('abcd', {
+    'cpy': ('vv', 'if b >= 0:\n    r[b] = r[a]'),
+    'inc': ('v', inc),
+    'dec': ('v', 'if a >= 0:\n    r[a] -= 1'),
+    'jnz': ('vv', 'if r[a]:\n    return ip + r[b]'),
+    'tgl': ('v', toggle)})
+
+MULTIPLY = tuple(ASSEMBUNNY.opcodes[name] for name in ('cpy', 'dec', 'jnz', 'dec', 'jnz'))
+
+
+def run(program, regs, trace=False):
+    computer = Machine(program, registers=regs)
+    if trace:
+        computer.run(trace=lambda m, ip: print(ip, m.steps, m.mnemonic(ip), m.registers()))
+    else:
+        computer.run(compiled=True)
+    return computer.registers()
+
+with open('23.txt') as f:
+    program = assemble(ASSEMBUNNY, f.read())
+
+print(run(program, regs={'a': 7, 'b': 0, 'c': 0, 'd': 0}, trace=False))
 # [12860, 1, 0, 0]
-print(run(tape[:], regs={'a': 12, 'b': 0, 'c': 0, 'd': 0}, trace=False))
+print(run(program, regs={'a': 12, 'b': 0, 'c': 0, 'd': 0}, trace=False))
@@ -52,35 +52,22 @@ register a and cause the code to output a clock signal of 0, 1, 0,
 1... repeating forever?
 '''
 
-def parse(line):
-    "Split line into words, and convert to int where appropriate."
-    return [(x if x.isalpha() else int(x))
-            for x in line.split()]
-
-def toggle(code, i):
-    if 0 <= i < len (code):
-        inst = code[i]
-        orig = inst[0]
-        inst[0] = ('dec' if inst[0] == 'inc' else
-                   'inc' if len(inst) == 2 else
-                   'cpy' if inst[0] == 'jnz' else
-                   'jnz')
-
-def run(code, regs, steps=10**10):
-    def val(x): return (regs[x] if x in regs else x)
-    pc = 0
-    for _ in range(steps):
-        if not (0 <= pc <= len(code)):
-            return
-        inst = code[pc]
-        op, x, y = inst[0], inst[1], inst[-1]
-        pc += 1
-        if   op == 'cpy' and y in regs: regs[y] = val(x)
-        elif op == 'inc':               regs[x] += 1
-        elif op == 'dec':               regs[x] -= 1
-        elif op == 'jnz' and val(x):    pc += val(y) - 1
-        elif op == 'tgl':               toggle (code, pc - 1 + val(x))
-        elif op == 'out':               yield val(x)
+from aoc.vm import ISA, Machine, assemble, smallest
+
+TOGGLED = {'inc': 'dec', 'dec': 'inc', 'tgl': 'inc', 'out': 'inc', 'jnz': 'cpy', 'cpy': 'jnz'}
+
+def toggle(m, r, ip, a, b, c):
+    target = ip + r[a]
+    if 0 <= target < len(m.code):
+        m.patch(target, TOGGLED[m.mnemonic(target)])
+
+ASSEMBUNNY = ISA('abcd', {
+    'cpy': ('vv', 'if b >= 0:\n    r[b] = r[a]'),
+    'inc': ('v', 'r[a] += 1'),
+    'dec': ('v', 'r[a] -= 1'),
+    'jnz': ('vv', 'if r[a]:\n    return ip + r[b]'),
+    'tgl': ('v', toggle),
+    'out': ('v', 'm.output.append(r[a])')})
 
 x = '''
 cpy a d
@@ -115,18 +102,23 @@ jnz a -19
 jnz 1 -21
 '''.strip()
 
-code = [parse(line) for line in x.splitlines()]
-
-import itertools
+code = assemble(ASSEMBUNNY, x)
 
 def repeats(a, code, steps=10**6, minsignals=100):
-    signals = run(code, dict(a=a, b=0, c=0, d=0), steps)
-    expecteds = itertools.cycle ((0, 1))
-    for (i, (signal, expected)) in enumerate(zip(signals, expecteds)):
-        if signal != expected:
+    "Does the clock put out 0, 1, 0, 1, ... for minsignals signals, given a?"
+    clock = Machine(code, registers={'a': a})
+    checked = 0
+    while clock.steps < steps and not clock.run(limit=1000, compiled=True):
+        signals = clock.output
+        if any(signals[i] != i % 2 for i in range(checked, len(signals))):
             return False
-    return i >= minsignals
+        checked = len(signals)
+        if checked > minsignals:
+            return True
+    return False
 
-def first(iterable): return next(iter(iterable))
+def clock(a): return repeats(a, code)
 
-print (first(a for a in range(1, 10**100) if repeats(a, code)))
+if __name__ == '__main__':
+    a, rate = smallest(clock, start=1)
+    print(a, '({:.0f} candidates/s)'.format(rate))
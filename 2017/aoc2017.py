@@ -7,7 +7,7 @@
 import io
 import re
 
-from aoc import Puzzle
+from aoc import Puzzle, always, Astar, bfs
 import numpy as np
 import math
 import random
@@ -229,29 +229,3 @@ def grep(pattern, iterable):
     for line in iterable:
         if re.search(pattern, line):
             print(line)
-
-################ A* and Breadth-First Search (tracking states, not actions)
-
-def always(value): return (lambda *args: value)
-
-def Astar(start, moves_func, h_func, cost_func=always(1)):
-    "Find a shortest sequence of states from start to a goal state (a state s with h_func(s) == 0)."
-    frontier  = [(h_func(start), start)] # A priority queue, ordered by path length, f = g + h
-    previous  = {start: None}  # start state has no previous state; other states will
-    path_cost = {start: 0}     # The cost of the best path to a state.
-    Path      = lambda s: ([] if (s is None) else Path(previous[s]) + [s])
-    while frontier:
-        (f, s) = heappop(frontier)
-        if h_func(s) == 0:
-            return Path(s)
-        for s2 in moves_func(s):
-            g = path_cost[s] + cost_func(s, s2)
-            if s2 not in path_cost or g < path_cost[s2]:
-                heappush(frontier, (g + h_func(s2), s2))
-                path_cost[s2] = g
-                previous[s2] = s
-
-def bfs(start, moves_func, goals):
-    "Breadth-first search"
-    goal_func = (goals if callable(goals) else lambda s: s in goals)
-    return Astar(start, moves_func, lambda s: (0 if goal_func(s) else 1))
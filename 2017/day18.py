@@ -142,99 +142,35 @@ them to do so), how many times did program 1 send a value?
 from aoc2017 import *
 
 
+from aoc.vm import ISA, Machine, assemble, schedule, Blocked, Halt
+
+# Part 2's reading of snd and rcv: send to, and receive from, the other program
+DUET = ISA(letters, {
+    'snd': ('v', 'm.output.append(r[a])'),
+    'set': ('rv', 'r[a] = r[b]'),
+    'add': ('rv', 'r[a] += r[b]'),
+    'mul': ('rv', 'r[a] *= r[b]'),
+    'mod': ('rv', 'r[a] %= r[b]'),
+    'rcv': ('r', 'if not m.input:\n    raise Blocked\nr[a] = m.input.popleft()'),
+    'jgz': ('vv', 'if r[a] > 0:\n    return ip + r[b]')})
+
+# Part 1's: play a sound, and stop at the first recover of a sound
+SOUND = DUET.extend({'rcv': ('v', 'if r[a]:\n    raise Halt')})
+
+
 def duet(tape):
-    regs = defaultdict(int)
-    lastsnd = 0
-
-    def get(arg):
-        if type(arg) == str:
-            return regs[arg]
-        return arg
-
-    ip = 0
-    while ip < len(tape):
-        insn, *args = tape[ip]
-        # print (ip, insn, args, regs, lastsnd)
-        if insn == 'snd':
-            lastsnd = regs[args[0]]
-        elif insn == 'set':
-            src = args[1]
-            if type(src) == str:
-                src = regs[src]
-            regs[args[0]] = src
-            pass
-        elif insn == 'add':
-            regs[args[0]] += get(args[1])
-        elif insn == 'mul':
-            regs[args[0]] *= get(args[1])
-        elif insn == 'mod':
-            regs[args[0]] %= get(args[1])
-        elif insn == 'rcv':
-            if get(args[0]) != 0:
-                break
-            pass
-        elif insn == 'jgz':
-            if get(args[0]) > 0:
-                ip += get(args[1])
-                continue
-        ip += 1
-    return lastsnd
-
-
-from enum import Enum
-
-State = Enum('State', 'Running Blocked Done')
+    sound = Machine(assemble(SOUND, tape))
+    sound.run()
+    return sound.output[-1]
 
 
 def run(tape):
-    ips = [0, 0]
-    regs = [defaultdict(int, p=0), defaultdict(int, p=1)]
-    msgq = [[], []]
-    sends = [0, 0]
-    states = [State.Running, State.Running]
-    prog = 0
-
-    def get(arg):
-        if type(arg) == str:
-            return regs[prog][arg]
-        return arg
-
-    while states != [State.Done, State.Done]:
-        ip = ips[prog]
-        insn, *args = tape[ip]
-        # print (prog, ip, insn, args, regs[prog], states)
-        if insn == 'rcv':
-            if not len(msgq[1 - prog]):
-                if states[1 - prog] in (State.Blocked, State.Done):
-                    states[prog] = State.Done
-                else:
-                    states[prog] = State.Blocked
-                ip -= 1  # Stay here
-            else:
-                states[prog] = State.Running
-                regs[prog][args[0]] = msgq[1 - prog].pop(0)
-        elif insn == 'snd':
-            msgq[prog].append(get(args[0]))
-            sends[prog] += 1
-        elif insn == 'set':
-            regs[prog][args[0]] = get(args[1])
-        elif insn == 'add':
-            regs[prog][args[0]] += get(args[1])
-        elif insn == 'mul':
-            regs[prog][args[0]] *= get(args[1])
-        elif insn == 'mod':
-            regs[prog][args[0]] %= get(args[1])
-        elif insn == 'jgz':
-            if get(args[0]) > 0:
-                ip += get(args[1]) - 1
-        ip += 1
-        if ip >= len(tape):
-            state[prog] = State.Done
-        ips[prog] = ip
-        prog = 1 - prog
-
-    return sends[1]
-
-tape = array(Input(18))
+    program = assemble(DUET, tape)
+    progs = [Machine(program, registers={'p': p}) for p in (0, 1)]
+    # Each one's sends go straight into the other's queue
+    progs[0].output, progs[1].output = progs[1].input, progs[0].input
+    return schedule(progs)[1]
+
+tape = Input(18).read()
 print (duet(tape))
 print (run(tape))
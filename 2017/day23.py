@@ -60,41 +60,154 @@ completion, what value would be left in register h?
 from aoc2017 import *
 
 
-def run(tape, debug=False):
-    regs = defaultdict(int)
-    if debug:
-        regs['a'] = 1
+from aoc.vm import ISA, Machine, assemble, match
 
-    def get(arg):
-        if type(arg) == str:
-            return regs[arg]
-        return arg
+COPROCESSOR = ISA(letters[:8], {
+    'set': ('rv', 'r[a] = r[b]'),
+    'sub': ('rv', 'r[a] -= r[b]'),
+    'mul': ('rv', 'r[a] *= r[b]'),
+    'jnz': ('vv', 'if r[a]:\n    return ip + r[b]')})
 
-    ip = 0
+
+def run(program, debug=False):
+    cpu = Machine(program, registers={'a': 1} if debug else {})
     counts = defaultdict(int)
-    while ip < len(tape):
-        insn, *args = tape[ip]
+
+    def trace(cpu, ip):
         if debug:
-            print(ip + 1, insn, args, sorted(regs.items()))
-        counts[insn] += 1
-        if insn == 'set':
-            regs[args[0]] = get(args[1])
-        elif insn == 'sub':
-            regs[args[0]] -= get(args[1])
-        elif insn == 'mul':
-            regs[args[0]] *= get(args[1])
-        elif insn == 'jnz':
-            if get(args[0]) != 0:
-                ip += get(args[1]) - 1
-            pass
+            print(ip + 1, program.source[ip], sorted(cpu.registers().items()))
+        counts[cpu.mnemonic(ip)] += 1
+
+    cpu.run(trace=trace)
+    return (cpu.registers(), counts)
+
+
+# Part 2 counts the composite numbers among b, b + 17, ... c, trying every pair of
+# factors d * e for each:
+#
+#   for b in b, b + 17 .. c:
+#       f = 1
+#       for d in 2 .. b - 1: for e in 2 .. b - 1: if d * e == b: f = 0
+#       if f == 0: h += 1
+COMPOSITES = '''
+set f 1
+set d 2
+set e 2
+set g d
+mul g e
+sub g b
+jnz g 2
+set f 0
+sub e -1
+set g e
+sub g b
+jnz g -8
+sub d -1
+set g d
+sub g b
+jnz g -13
+jnz f 2
+sub h -1
+set g b
+sub g c
+jnz g 2
+jnz 1 3
+sub b -17
+jnz 1 -23
+'''
+LENGTH = len(COMPOSITES.split('\n')) - 2
+STEP = 17
+
+Loop = namedtuple('Loop', 'start b c d e f g h')
+
+
+def primes_upto(n):
+    sieve = bytearray([1]) * (n + 1)
+    sieve[:2] = b'\0\0'
+    for p in range(2, math.isqrt(n) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, n + 1, p)))
+    return [p for p in range(n + 1) if sieve[p]]
+
+
+def divisors(n, primes):
+    "How many divisors n has, given the primes up to its square root."
+    count = 1
+    for p in primes:
+        if p * p > n:
+            break
+        k = 1
+        while n % p == 0:
+            n //= p
+            k += 1
+        count *= k
+    return count * 2 if n > 1 else count
+
+
+def skip(cpu, loop):
+    "Do what the composite-counting loops would do, from their start, all at once."
+    r = cpu.regs
+    lo, hi = r[loop.b], r[loop.c]
+    primes = primes_upto(math.isqrt(hi))
+    # Sieve out the composites in [lo, hi]
+    prime = bytearray([1]) * (hi - lo + 1)
+    for p in primes:
+        multiple = max(p * p, (lo + p - 1) // p * p)
+        prime[multiple - lo::p] = bytes(len(range(multiple, hi + 1, p)))
+    for b in range(lo, hi + 1, STEP):
+        composite = not prime[b - lo]
+        r[loop.h] += composite
+        cpu.steps += (2 + (b - 2) * (5 + 8 * (b - 2)) + divisors(b, primes) - 2 +
+                      4 + composite + (1 if b == hi else 2))
+    r[loop.b] = r[loop.d] = r[loop.e] = hi
+    r[loop.f] = 0 if composite else 1
+    r[loop.g] = 0
+    cpu.ip = loop.start + LENGTH
+
+
+def skippable(cpu, loop):
+    "Can skip() do the loops from here? Not if they'd never end, or run past c."
+    b, c = cpu.regs[loop.b], cpu.regs[loop.c]
+    return 3 <= b <= c and (c - b) % STEP == 0
+
+
+def find_loop(program):
+    """Where the composite-counting loops are, and their registers, if skip() does
+    what the interpreter does on some small ranges."""
+    for start in range(len(program.code)):
+        binding = match(COMPOSITES, program, start)
+        if binding is not None:
+            loop = Loop(start, **binding)
+            break
+    else:
+        return None
+    for b, n in product((3, 4, 9), (0, 1)):
+        seed = [k + 11 for k in range(8)]
+        seed[loop.b], seed[loop.c], seed[loop.h] = b, b + n * STEP, b + n
+        slow, fast = Machine(program, registers=seed), Machine(program, registers=seed)
+        slow.ip = fast.ip = start
+        slow.run(breakpoints={start + LENGTH})
+        skip(fast, loop)
+        if (slow.regs, slow.ip, slow.steps) != (fast.regs, fast.ip, fast.steps):
+            return None
+    return loop
+
+
+def execute(program, regs):
+    "Run the program, skipping the composite-counting loops where it can."
+    cpu = Machine(program, registers=regs)
+    loop = find_loop(program)
+    breakpoints = {loop.start} if loop else ()
+    while not cpu.run(compiled=True, breakpoints=breakpoints):
+        if skippable(cpu, loop):
+            skip(cpu, loop)
         else:
-            assert False, 'Unknown instruction: {}'.format(tape[ip])
-        ip += 1
-    return (regs, counts)
+            cpu.run(limit=1)
+    return cpu.registers()
 
 
-tape = array(Input(23))
+program = assemble(COPROCESSOR, Input(23).read())
 
-_, counts = run(tape)
+_, counts = run(program)
 print(counts['mul'])
-run(tape, debug=True)
+print(execute(program, {'a': 1})['h'])
@@ -7,7 +7,8 @@
 import io
 import re
 
-from aoc import Puzzle
+from aoc import Puzzle, always, Astar, bfs, Automaton, Grid, fast_forward
+from aoc.vm import ISA, Machine, assemble, match
 import numpy as np
 import math
 import random
@@ -230,28 +231,65 @@ def grep(pattern, iterable):
         if re.search(pattern, line):
             print(line)
 
-################ A* and Breadth-First Search (tracking states, not actions)
-
-def always(value): return (lambda *args: value)
-
-def Astar(start, moves_func, h_func, cost_func=always(1)):
-    "Find a shortest sequence of states from start to a goal state (a state s with h_func(s) == 0)."
-    frontier  = [(h_func(start), start)] # A priority queue, ordered by path length, f = g + h
-    previous  = {start: None}  # start state has no previous state; other states will
-    path_cost = {start: 0}     # The cost of the best path to a state.
-    Path      = lambda s: ([] if (s is None) else Path(previous[s]) + [s])
-    while frontier:
-        (f, s) = heappop(frontier)
-        if h_func(s) == 0:
-            return Path(s)
-        for s2 in moves_func(s):
-            g = path_cost[s] + cost_func(s, s2)
-            if s2 not in path_cost or g < path_cost[s2]:
-                heappush(frontier, (g + h_func(s2), s2))
-                path_cost[s2] = g
-                previous[s2] = s
-
-def bfs(start, moves_func, goals):
-    "Breadth-first search"
-    goal_func = (goals if callable(goals) else lambda s: s in goals)
-    return Astar(start, moves_func, lambda s: (0 if goal_func(s) else 1))
+################ Elf code (days 16, 19 and 21)
+
+# Six registers; operand c of every instruction is the register it stores into
+ELF = ISA('012345', {
+    'addr': ('rrr', 'r[c] = r[a] + r[b]'),
+    'addi': ('rir', 'r[c] = r[a] + b'),
+    'mulr': ('rrr', 'r[c] = r[a] * r[b]'),
+    'muli': ('rir', 'r[c] = r[a] * b'),
+    'banr': ('rrr', 'r[c] = r[a] & r[b]'),
+    'bani': ('rir', 'r[c] = r[a] & b'),
+    'borr': ('rrr', 'r[c] = r[a] | r[b]'),
+    'bori': ('rir', 'r[c] = r[a] | b'),
+    'setr': ('rir', 'r[c] = r[a]'),
+    'seti': ('iir', 'r[c] = a'),
+    'gtir': ('irr', 'r[c] = 1 if a > r[b] else 0'),
+    'gtri': ('rir', 'r[c] = 1 if r[a] > b else 0'),
+    'gtrr': ('rrr', 'r[c] = 1 if r[a] > r[b] else 0'),
+    'eqir': ('irr', 'r[c] = 1 if a == r[b] else 0'),
+    'eqri': ('rir', 'r[c] = 1 if r[a] == b else 0'),
+    'eqrr': ('rrr', 'r[c] = 1 if r[a] == r[b] else 0')})
+
+def elf_trace(machine, ip):
+    "A trace hook for Elf machines: print each instruction and the registers."
+    print(machine.steps, ip, machine.program.source[ip], machine.regs)
+
+# Loop templates for aoc.vm.match, one instruction per line
+def elf_template(text): return [line.split() for line in text.strip().splitlines()]
+
+# Whose first two operands can come either way round
+COMMUTATIVE = {'addr', 'mulr', 'banr', 'borr', 'eqrr'}
+
+def elf_profile(program, regs, steps=10**4):
+    "How many times each instruction runs in the first few steps."
+    counts = Counter()
+    Machine(program, registers=list(regs)).run(
+        limit=steps, trace=lambda machine, ip: counts.update((ip,)))
+    return counts
+
+def elf_loop(program, regs, template, summary, seeds):
+    """Find the loop matching template around the hottest instruction, as a
+    namedtuple of its registers and start. summary(machine, loop) must do what
+    one run through the loop does, checked against the interpreter for each
+    list of registers that seeds(loop) yields; otherwise there is no loop."""
+    hottest = first(ip for ip, _ in elf_profile(program, regs).most_common(1))
+    if hottest is None:
+        return None
+    for start in range(max(0, hottest - len(template) + 1), hottest + 1):
+        binding = match(template, program, start, COMMUTATIVE)
+        if binding is not None:
+            loop = namedtuple('Loop', ['start', *binding])(start, **binding)
+            break
+    else:
+        return None
+    end = loop.start + len(template)
+    for seed in seeds(loop):
+        slow, fast = Machine(program, registers=seed), Machine(program, registers=seed)
+        slow.ip = fast.ip = loop.start
+        slow.run(breakpoints={end}, limit=10**5)
+        summary(fast, loop)
+        if (slow.regs, slow.ip, slow.steps) != (fast.regs, fast.ip, fast.steps):
+            return None
+    return loop
@@ -163,18 +163,24 @@ def print_state(pots, generation):
 
 
 def generations(pots, rules, rounds, debug=False):
+    def step(pots):
+        return frozenset(evolve(pots, rules))
+
+    def pattern(pots):
+        "The plants relative to the leftmost one: the same pattern can drift along the row."
+        leftmost = min(pots)
+        return frozenset(k - leftmost for k in pots)
+
     if debug:
         print_state(pots, 0)
-    for gen in range(rounds):
-        newpots = set(evolve(pots, rules))
-        if debug:
-            print_state(newpots, gen + 1)
-        if set(k - 1 for k in newpots) == pots:
-            # Steady state
-            pots = set(rounds + k - gen - 1 for k in newpots)
-            gen = rounds - 1
-            break
-        pots = newpots
+    pots, start, length = fast_forward(step, frozenset(pots), rounds, key=pattern)
+    if start is not None:
+        # Steady state: move the pattern as far as the remaining cycles would have
+        drift = min(fast_forward(step, pots, length)[0]) - min(pots)
+        cycles = (rounds - start) // length
+        pots = set(k + cycles * drift for k in pots)
+    if debug:
+        print_state(pots, rounds)
     return pots
 
 
@@ -115,23 +115,6 @@ behave like three or more opcodes?
 from aoc2018 import *
 
 
-MACH = {'addr': lambda regs, args: regs[args[0]] + regs[args[1]],
-        'addi': lambda regs, args: regs[args[0]] + args[1],
-        'mulr': lambda regs, args: regs[args[0]] * regs[args[1]],
-        'muli': lambda regs, args: regs[args[0]] * args[1],
-        'banr': lambda regs, args: regs[args[0]] & regs[args[1]],
-        'bani': lambda regs, args: regs[args[0]] & args[1],
-        'borr': lambda regs, args: regs[args[0]] | regs[args[1]],
-        'bori': lambda regs, args: regs[args[0]] | args[1],
-        'setr': lambda regs, args: regs[args[0]],
-        'seti': lambda regs, args: args[0],
-        'gtir': lambda regs, args: 1 if args[0] > regs[args[1]] else 0,
-        'gtri': lambda regs, args: 1 if regs[args[0]] > args[1] else 0,
-        'gtrr': lambda regs, args: 1 if regs[args[0]] > regs[args[1]] else 0,
-        'eqir': lambda regs, args: 1 if args[0] == regs[args[1]] else 0,
-        'eqri': lambda regs, args: 1 if regs[args[0]] == args[1] else 0,
-        'eqrr': lambda regs, args: 1 if regs[args[0]] == regs[args[1]] else 0}
-
 tests, at_least_three = 0, 0
 opcode_candidates = defaultdict(set)
 tape = []
@@ -143,9 +126,10 @@ for line in [line.strip() for line in Input(16).readlines()]:
         after = vector(line[9:-1])
         opcode = args[0]
         candidates = 0
-        for name, func in MACH.items():
-            result = func(before, args[1:])
-            if result == after[args[3]]:
+        for name in ELF.names:
+            regs = list(before)
+            ELF[name](None, regs, 0, *args[1:])
+            if regs[args[3]] == after[args[3]]:
                 opcode_candidates[opcode].add(name)
                 candidates += 1
             else:
@@ -175,10 +159,7 @@ while len(opcodes) != len(opcode_candidates):
                 # We know this one for sure now
                 opcodes[num] = first(names)
 
-regs = [0] * 4
-for args in tape:
-    opcode, args = args[0], args[1:]
-    func = MACH[opcodes[opcode]]
-    regs[args[2]] = func(regs, args)
-
-print(regs[0])
+program = assemble(ELF, ['{} {} {} {}'.format(opcodes[op], *args) for op, *args in tape])
+device = Machine(program)
+device.run()
+print(device.regs[0])
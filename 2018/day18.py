@@ -183,101 +183,41 @@ What will the total resource value of the lumber collection area be after 10 min
 '''
 
 from aoc2018 import *
-import collections
 
 
-class Point(collections.namedtuple('Point', ['y', 'x'])):
-    def __add__(self, other):
-        return type(self)(self.y + other.y, self.x + other.x)
+OPEN, TREE, YARD = '.', '|', '#'
+OPEN_, TREE_, YARD_ = range(3)  # as cell states for the automaton
 
-    @property
-    def neighbors(self):
-        return [self + step for step in [Point(-1, -1), Point(0, -1), Point(1, -1),
-                                         Point(-1, 0), Point(1, 0),
-                                         Point(-1, 1), Point(0, 1), Point(1, 1)]]
+# Each acre's next state, as one table lookup per acre on the whole area at once
+LUMBER = Automaton.from_rule(
+    lambda acre, trees, yards: (
+        (TREE_ if trees >= 3 else OPEN_) if acre == OPEN_ else
+        (YARD_ if yards >= 3 else TREE_) if acre == TREE_ else
+        (YARD_ if yards >= 1 and trees >= 1 else OPEN_)),
+    states=3, counted=(TREE_, YARD_))
 
 
-OPEN, TREE, YARD = '.', '|', '#'
+def resource_value(text, minutes):
+    codes = np.zeros(256, dtype=np.uint8)
+    codes[ord(TREE)], codes[ord(YARD)] = TREE_, YARD_
+    area = LUMBER.run(codes[Grid(text).array()], minutes)
+    return int((area == TREE_).sum()) * int((area == YARD_).sum())
 
 
-class Forest(dict):
-    def __init__(self, lines):
-        super().__init__(self)
-        if isinstance(lines, str):
-            lines = lines.splitlines()
-        rows, cols = (0, 0)
-        for y, row in enumerate(lines):
-            rows += 1
-            row = row.strip()
-            cols = max(cols, len(row))
-            for x, c in enumerate(row):
-                p = Point(y, x)
-                self[Point(y, x)] = c
-        self.shape = (rows, cols)
-        self.counts = Counter(c for c in self.values())
-        self.ticks = 0
-        self.seen = {}
-        self.chain = []
-        self.encoded = self.encode()
-
-    def dump(self):
-        rows, cols = self.shape
-        for y in range(rows):
-            line = [self.get(Point(y, x), '%') for x in range(cols)]
-            print(''.join(line))
-
-    def encode(self):
-        return ''.join(self.values())
-
-    @staticmethod
-    def calc_score(ctr):
-        return ctr[TREE] * ctr[YARD]
-
-    def score(self):
-        return self.calc_score(self.counts)
-
-    def tick(self):
-        changes = []
-        for point, glyph in self.items():
-            neighbors = Counter(self[n] for n in point.neighbors if n in self)
-            if glyph == OPEN and neighbors.get(TREE, 0) >= 3:
-                changes.append((point, TREE))
-            elif glyph == TREE and neighbors.get(YARD, 0) >= 3:
-                changes.append((point, YARD))
-            elif glyph == YARD and not (
-                    neighbors.get(YARD, 0) >= 1
-                    and neighbors.get(TREE, 0) >= 1):
-                changes.append((point, OPEN))
-        for point, glyph in changes:
-            self.counts.update({self[point]: -1, glyph: 1})
-            self[point] = glyph
-        self.encoded = self.encode()
-        return len(changes)
-
-    def solve(self, ticks=10, verbose=False):
-        for tick in range(ticks - self.ticks):
-            self.ticks += 1
-            before = self.encoded
-            idx = self.seen.get(before, None)
-            if idx is not None:
-                # We found a cycle
-                cycle_begin = idx
-                cycle_len = self.ticks - cycle_begin
-                offset = cycle_begin + (ticks - cycle_begin - 1) % cycle_len
-                final = self.chain[offset]
-                self.counts = Counter(x for x in final)
-                print(self.ticks, idx, cycle_len, offset,
-                      self.counts, self.score(), final)
-                break
-            changes = self.tick()
-            print(self.ticks, changes, self.counts, self.score())
-            self.chain.append(self.encoded)
-            self.seen[before] = len(self.chain)
-            assert len(self.chain) == self.ticks
-
-
-f = Forest(Input(18))
-f.solve()
-print(f.score())
-f.solve(1000000000)
-print(f.score())
+EXAMPLE = """
+.#.#...|#.
+.....#|##|
+.|..|...#.
+..|#.....#
+#.#|||#|#|
+...#.||...
+.|....|...
+||...#|.#|
+|.||||..|.
+...#.|..|.
+"""
+assert resource_value(EXAMPLE, 10) == 1147
+
+text = Input(18).read()
+print(resource_value(text, 10))
+print(resource_value(text, 1000000000))
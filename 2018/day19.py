@@ -112,44 +112,69 @@ What value is left in register 0 when the background process halts?
 
 from aoc2018 import *
 
-MACH = {'addr': lambda regs, args: regs[args[0]] + regs[args[1]],
-        'addi': lambda regs, args: regs[args[0]] + args[1],
-        'mulr': lambda regs, args: regs[args[0]] * regs[args[1]],
-        'muli': lambda regs, args: regs[args[0]] * args[1],
-        'banr': lambda regs, args: regs[args[0]] & regs[args[1]],
-        'bani': lambda regs, args: regs[args[0]] & args[1],
-        'borr': lambda regs, args: regs[args[0]] | regs[args[1]],
-        'bori': lambda regs, args: regs[args[0]] | args[1],
-        'setr': lambda regs, args: regs[args[0]],
-        'seti': lambda regs, args: args[0],
-        'gtir': lambda regs, args: 1 if args[0] > regs[args[1]] else 0,
-        'gtri': lambda regs, args: 1 if regs[args[0]] > args[1] else 0,
-        'gtrr': lambda regs, args: 1 if regs[args[0]] > regs[args[1]] else 0,
-        'eqir': lambda regs, args: 1 if args[0] == regs[args[1]] else 0,
-        'eqri': lambda regs, args: 1 if regs[args[0]] == args[1] else 0,
-        'eqrr': lambda regs, args: 1 if regs[args[0]] == regs[args[1]] else 0}
-
-
-def execute(tape, regs=None, debug=False):
-    ipreg = tape[0][1]
-    assert ipreg >= 0 and ipreg < 6
-    tape = tuple(tape[1:])
-    if regs is None:
-        regs = [0] * 6
-    ip = 0
-    cycles = 0
-    while ip >= 0 and ip < len(tape):
-        cycles += 1
-        regs[ipreg] = ip
-        insn, *args = tape[ip]
-        regs[args[2]] = MACH[insn](regs, args)
-        if debug or cycles % 10 ** 6 == 0:
-            print(cycles, ip, [], insn, args, regs)
-        ip = regs[ipreg] + 1
-    return regs
-
-
-tape = array('''#ip 0
+# The background process spends its time summing the divisors of a big number,
+# the slow way:
+#
+#   for i in 1..N: for j in 1..N: if i * j == N: s += i
+DIVISOR_SUM = elf_template('''
+seti 1 _ i
+seti 1 _ j
+mulr i j t
+eqrr t N t
+addr t IP IP
+addi IP 1 IP
+addr i s s
+addi j 1 j
+gtrr j N t
+addr IP t IP
+seti +1 _ IP
+addi i 1 i
+gtrr i N t
+addr t IP IP
+seti +0 _ IP
+''')
+
+
+def divisor_sum(n):
+    "The sum of the divisors of n, in O(sqrt(n))."
+    return sum(d + (n // d if d * d != n else 0)
+               for d in range(1, math.isqrt(n) + 1) if n % d == 0)
+
+
+def skip(device, loop):
+    "Do what the divisor-sum loop would do, from its start, all at once."
+    r = device.regs
+    n = r[loop.N]
+    r[loop.s] += divisor_sum(n)
+    r[loop.i] = r[loop.j] = n + 1
+    r[loop.t] = 1
+    r[loop.IP] = loop.start + len(DIVISOR_SUM) - 1
+    device.ip = loop.start + len(DIVISOR_SUM)
+    device.steps += 8 * n * n + 4 * n
+
+
+def seeds(loop):
+    "Small divisor sums, with junk in the other registers."
+    for n in range(1, 25):
+        seed = [n * k + 3 for k in range(6)]
+        seed[loop.N] = n
+        yield seed
+
+
+def execute(program, regs=(), debug=False):
+    device = Machine(program, registers=list(regs))
+    if debug:
+        device.run(trace=elf_trace)
+        return device.regs
+    loop = elf_loop(program, regs, DIVISOR_SUM, skip, seeds)
+    breakpoints = {loop.start} if loop else ()
+    while not device.run(compiled=True, breakpoints=breakpoints):
+        if device.regs[loop.N] > 0:
+            skip(device, loop)
+    return device.regs
+
+
+program = assemble(ELF, '''#ip 0
 seti 5 0 1
 seti 6 0 2
 addi 0 1 0
@@ -157,11 +182,11 @@ addr 1 2 3
 setr 1 0 0
 seti 8 0 4
 seti 9 0 5''')
-print(execute(tape))
+print(execute(program))
 
-tape = array(Input(19).read())
-regs = execute(tape)
+program = assemble(ELF, Input(19).read())
+regs = execute(program)
 print(regs)
 
-regs = execute(tape, regs=[1, 0, 0, 0, 0, 0], debug=True)
+regs = execute(program, regs=[1, 0, 0, 0, 0, 0])
 print(regs)
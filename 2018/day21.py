@@ -55,43 +55,76 @@ instructions executed.)
 
 from aoc2018 import *
 
-MACH = {'addr': lambda regs, args: regs[args[0]] + regs[args[1]],
-        'addi': lambda regs, args: regs[args[0]] + args[1],
-        'mulr': lambda regs, args: regs[args[0]] * regs[args[1]],
-        'muli': lambda regs, args: regs[args[0]] * args[1],
-        'banr': lambda regs, args: regs[args[0]] & regs[args[1]],
-        'bani': lambda regs, args: regs[args[0]] & args[1],
-        'borr': lambda regs, args: regs[args[0]] | regs[args[1]],
-        'bori': lambda regs, args: regs[args[0]] | args[1],
-        'setr': lambda regs, args: regs[args[0]],
-        'seti': lambda regs, args: args[0],
-        'gtir': lambda regs, args: 1 if args[0] > regs[args[1]] else 0,
-        'gtri': lambda regs, args: 1 if regs[args[0]] > args[1] else 0,
-        'gtrr': lambda regs, args: 1 if regs[args[0]] > regs[args[1]] else 0,
-        'eqir': lambda regs, args: 1 if args[0] == regs[args[1]] else 0,
-        'eqri': lambda regs, args: 1 if regs[args[0]] == args[1] else 0,
-        'eqrr': lambda regs, args: 1 if regs[args[0]] == regs[args[1]] else 0}
-
-
-def execute(tape, regs=None, debug=False):
-    ipreg = tape[0][1]
-    assert ipreg >= 0 and ipreg < 6
-    tape = tuple(tape[1:])
-    if regs is None:
-        regs = [0] * 6
-    ip = 0
-    cycles = 0
-    while ip >= 0 and ip < len(tape):
-        cycles += 1
-        regs[ipreg] = ip
-        insn, *args = tape[ip]
-        regs[args[2]] = MACH[insn](regs, args) & 0xffffffff
-        if debug or cycles % 10 ** 6 == 0:
-            print(cycles, ip, [], insn, args, regs)
-        ip = regs[ipreg] + 1
-    return regs, cycles
-
-
-tape = array(Input(21).read())
-result = execute(tape, regs=[37, 0, 0, 0, 0, 0], debug=True)
-print(result)
+# Register 0 is only ever read by the check that halts the program, so the
+# answers are the first value compared with it, and the last new one before
+# the values start repeating.
+def halting_check(program):
+    "The address of the halting check, and the register it compares with 0."
+    for ip, (op, a, b, c) in enumerate(program.code):
+        if ELF.names[op] == 'eqrr' and 0 in (a, b):
+            return ip, b if a == 0 else a
+    raise ValueError('no halting check')
+
+
+# Most of the time goes on dividing by 256, by counting up until q + 1 is too big
+DIVIDE = elf_template('''
+seti 0 _ q
+addi q 1 t
+muli t 256 t
+gtrr t n t
+addr t IP IP
+addi IP 1 IP
+seti +8 _ IP
+addi q 1 q
+seti +0 _ IP
+''')
+
+
+def divide(device, loop):
+    "Do what the divide-by-256 loop would do, from its start, all at once."
+    r = device.regs
+    q = max(0, r[loop.n] // 256)
+    r[loop.q] = q
+    r[loop.t] = 1
+    r[loop.IP] = loop.start + len(DIVIDE) - 1
+    device.ip = loop.start + len(DIVIDE)
+    device.steps += 7 * q + 6
+
+
+def seeds(loop):
+    "Dividends either side of multiples of 256, with junk in the other registers."
+    for n in (0, 1, 255, 256, 257, 1000, 4095, 4096):
+        seed = [n * k + 5 for k in range(6)]
+        seed[loop.n] = n
+        yield seed
+
+
+def halting_values(program):
+    "Generate the values the halting check compares with register 0, in order."
+    check, reg = halting_check(program)
+    loop = elf_loop(program, (), DIVIDE, divide, seeds)
+    breakpoints = {check, loop.start} if loop else {check}
+    device = Machine(program)
+    while not device.run(compiled=True, breakpoints=breakpoints):
+        if device.ip == check:
+            yield device.regs[reg]
+        else:
+            divide(device, loop)
+
+
+def first_and_last(values):
+    "The first value, and the last one before any value repeats."
+    seen = set()
+    first = last = None
+    for value in values:
+        if value in seen:
+            break
+        if first is None:
+            first = value
+        seen.add(value)
+        last = value
+    return first, last
+
+
+program = assemble(ELF, Input(21).read())
+print(first_and_last(halting_values(program)))
@@ -151,32 +151,28 @@ thrusters?
 
 from aoc import *
 from inputs import Input
-from intcode import Intcode
+from intcode import Intcode, Network, run_batch
 from itertools import permutations
 
 
-def amplify(tape, phases):
-    result = 0
-    for perm in permutations(phases):
-        amps = []
-        prev = None
-        for phase in perm:
-            amp = Intcode(tape, input=[phase] + ([0] if not prev else []))
-            if prev:
-                prev.output = amp.input
-            amps.append(amp)
-            prev = amp
-        final = amps[-1]
-        final.output = amps[0].input
-        running = amps[:]
-        while running:
-            for a in running:
-                a.run()
-            running = [a for a in running if not a.done()]
-        assert final.output
-        result = max(result, final.output[-1])
-        # print(perm, result)
-    return result
+def signal(tape, phases):
+    "The thruster signal from one ordering of the amplifiers' phase settings."
+    network = Network()
+    amps = [network.add(Intcode(tape, input=[phase])) for phase in phases]
+    # Each amplifier feeds the next; the last one feeds back into the first
+    for amp, nxt in zip(amps, amps[1:] + amps[:1]):
+        network.connect(amp, nxt)
+    network.send(amps[0], 0)
+    network.run()
+    final = amps[-1]
+    assert final.output
+    return final.output[-1]
+
+
+def amplify(tape, phases, workers=1):
+    """The best signal over every ordering of phases. Each takes a couple of
+    milliseconds, so they run here unless workers asks for a process pool."""
+    return max(run_batch(tape, signal, permutations(phases), workers=workers))
 
 
 assert (
@@ -264,73 +264,88 @@ to simulate the universe.
 How many steps does it take to reach the first state that exactly matches a previous state?
 """
 
-from aoc import *
-from inputs import Input
 import math
 
+import numpy as np
 
-def energy(moons):
-    return sum(
-        sum(abs(p) for p, v in t) * sum(abs(v) for p, v in t)
-        for t in zip(moons[0], moons[1], moons[2])
-    )
-
-
-def deltav(p1, p2):
-    if p1 < p2:
-        return +1
-    elif p1 > p2:
-        return -1
-    return 0
-
-
-def step1d(dim, debug=False):
-    r1 = []
-    for i, (p1, v1) in enumerate(dim):
-        for j, (p2, v2) in enumerate(dim):
-            if i == j:
-                continue
-            if debug:
-                print(i, j, p1, p2, v1, deltav(p1, p2))
-            v1 += deltav(p1, p2)
-        r1.append((p1, v1))
-    return [(p + v, v) for p, v in r1]
-
-
-def step(moons, debug=False):
-    return tuple(step1d(dim, debug) for dim in moons)
+from aoc import *
+from inputs import Input
 
 
 def parse(input):
-    moons = [], [], []
+    "Positions of the moons, one row per axis (x, y, z), one column per moon."
+    moons = []
     for line in [l.strip() for l in input]:
-        tokens = [t.strip("<").strip(">") for t in line.split(", ")]
-        for i, pos in enumerate(int(t.split("=")[1]) for t in tokens):
-            moons[i].append((pos, 0))
-    return moons
-
-
-def run(moons, steps):
+        if line:
+            tokens = [t.strip("<").strip(">") for t in line.split(", ")]
+            moons.append([int(t.split("=")[1]) for t in tokens])
+    return np.array(moons, dtype=np.int64).T
+
+
+def gravity(pos, scratch=None):
+    """The change in velocity of each moon along each axis: the sum over the other
+    moons of np.sign(theirs - its position). For a handful of moons, that's
+    just what we work out; for more, it's how many moons are further along the
+    axis less how many are behind, counted in one sort of all the axes side by
+    side rather than an n x n matrix of differences, so thousands are fine.
+    scratch, an array the shape of that matrix, saves allocating it each time."""
+    naxes, n = pos.shape
+    if n <= 64:
+        if scratch is None:
+            scratch = np.empty((naxes, n, n), dtype=pos.dtype)
+        np.subtract(pos[:, None, :], pos[:, :, None], out=scratch)
+        return np.sign(scratch, out=scratch).sum(axis=2)
+    low, width = pos.min(), np.ptp(pos) + 1
+    # Shift each axis into its own range of values, so they sort apart
+    keys = pos - low + width * np.arange(naxes)[:, None]
+    ranks = np.sort(keys, axis=None)
+    base = n * np.arange(naxes)[:, None]
+    behind = np.searchsorted(ranks, keys, side="left") - base
+    further = base + n - np.searchsorted(ranks, keys, side="right")
+    return further - behind
+
+
+def step(pos, vel):
+    vel = vel + gravity(pos)
+    return pos + vel, vel
+
+
+def run(pos, steps):
+    vel = np.zeros_like(pos)
     for _ in range(steps):
-        moons = step(moons)
-    return moons
-
-
-def lcm(a, b):
-    return a * b // math.gcd(a, b)
+        pos, vel = step(pos, vel)
+    return pos, vel
+
+
+def energy(state):
+    pos, vel = state
+    return int((np.abs(pos).sum(axis=0) * np.abs(vel).sum(axis=0)).sum())
+
+
+def periods(start):
+    """How many steps each axis takes to repeat. The axes move independently, and
+    a step can be undone (so the first state to come round again is the
+    first), so each axis repeats when it gets back to its start, at rest: no
+    need to remember the states in between."""
+    pos, vel = start.copy(), np.zeros_like(start)
+    naxes, n = start.shape
+    scratch = np.empty((naxes, n, n), dtype=pos.dtype) if n <= 64 else None
+    found = [None] * naxes
+    steps = 0
+    while None in found:
+        vel += gravity(pos, scratch)
+        pos += vel
+        steps += 1
+        if 0 not in vel[:, 0].tolist():
+            continue  # the first moon is moving along every axis, so none are back
+        back = (pos == start).all(axis=1) & ~vel.any(axis=1)
+        for axis in np.flatnonzero(back):
+            found[axis] = found[axis] or steps
+    return found
 
 
 def run2(moons):
-    freq = []
-    for i, dim in enumerate(moons):
-        seen = set()
-        steps = 0
-        while tuple(dim) not in seen:
-            seen.add(tuple(dim))
-            dim = step1d(dim)
-            steps += 1
-        freq.append(steps)
-    return lcm(lcm(freq[0], freq[1]), freq[2])
+    return math.lcm(*periods(moons))
 
 
 EX1 = """
@@ -355,6 +370,7 @@ EX3 = """
 <x=9, y=-8, z=-3>
 """
 
+assert energy(run(parse(EX1.strip().splitlines()), 10)) == 179
 assert energy(run(parse(EX2.strip().splitlines()), 100)) == 1940
 assert run2(parse(EX1.strip().splitlines())) == 2772
 assert run2(parse(EX3.strip().splitlines())) == 4686774924
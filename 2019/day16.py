@@ -136,40 +136,84 @@ list?
 
 """
 
-import itertools
+import numpy as np
+
 from aoc import *
 from inputs import Input
 
 
-def fft(input, rounds=1):
-    seen = set()
-    for _ in range(rounds):
-        output = []
-        for i in range(1, len(input) + 1):
-            mults = [0] * i + [1] * i + [0] * i + [-1] * i
-            mults = list(itertools.islice(itertools.cycle(mults), len(input) + 1))[1:]
-            digit = abs(sum(x * y for x, y in zip(input, mults))) % 10
-            # print(" ".join("{}*{}".format(x, y) for x, y in zip(input, mults)), "=", digit)
-            output.append(digit)
-        tpl = tuple(output)
-        if tpl in seen:
-            print((_, tpl))
-        seen.add(tpl)
-        input = output
+def digits(text):
+    return np.array([int(c) for c in text.strip()], dtype=np.int8)
+
+
+def message(signal, start=0, length=8):
+    return "".join(str(d) for d in signal[start : start + length])
+
+
+def plan(n):
+    """Where the runs of 1s and -1s in the patterns for a signal of length n start
+    and stop. Output digit i (counting from 1) adds up runs of i input digits,
+    every 4 * i digits from i - 1 on, taking away those 2 * i digits later.
+    Returns the (start, stop) indices of all the added runs and of all the taken
+    away ones, as flat arrays in order of i, and where each i's runs start in
+    them (for np.add.reduceat): there are about (n / 4) log n runs in all."""
+    starts = [np.arange(i - 1, n, 4 * i) for i in range(1, n + 1)]
+    offsets = np.cumsum([0] + [len(s) for s in starts[:-1]])
+    sizes = np.repeat(np.arange(1, n + 1), [len(s) for s in starts])
+    plus = np.concatenate(starts)
+    minus = plus + 2 * sizes
+    return [
+        np.minimum(index, n) for index in (plus, plus + sizes, minus, minus + sizes)
+    ], offsets
+
+
+def fft(signal, rounds=1):
+    """Run rounds phases of FFT on signal. Each run of a pattern adds up a slice
+    of the input, and the sum of any slice is the difference of two prefix sums,
+    so a phase costs O(n log n) rather than O(n**2)."""
+    (a, b, c, d), offsets = plan(len(signal))
+
+    def phase(signal):
+        sums = np.concatenate(([0], np.cumsum(signal, dtype=np.int64)))
+        runs = sums[b] - sums[a] - (sums[d] - sums[c])
+        return (np.abs(np.add.reduceat(runs, offsets)) % 10).astype(np.int8)
+
+    output, start, length = fast_forward(phase, signal, rounds, key=np.ndarray.tobytes)
+    if start is not None:
+        print((start, length, message(output)))
     return output
 
 
-# 80871224585914546619083218645595 becomes 24176176.
-assert fft([int(x) for x in list("80871224585914546619083218645595")], 100)[:8] == [
-    int(x) for x in list("24176176")
-]
+def tail(signal, offset, rounds=100, repeat=10000):
+    """FFT of signal repeated `repeat` times, from offset to the end. In the second
+    half, every pattern is 0s up to its own digit and 1s after it, so each
+    output digit is the sum of the input from there on, mod 10: a reverse
+    cumulative sum over just the suffix, kept as one digit a byte."""
+    n = len(signal) * repeat
+    if offset < n // 2:
+        raise ValueError(
+            "offset {} is in the first half of {} digits".format(offset, n)
+        )
+    suffix = np.resize(np.roll(signal, -offset), n - offset)
+    for _ in range(rounds):
+        suffix = (np.cumsum(suffix[::-1], dtype=np.int32)[::-1] % 10).astype(np.int8)
+    return suffix
+
+
+def part2(signal):
+    return message(tail(signal, int(message(signal, length=7))))
+
+
+assert message(fft(digits("12345678"), 4)) == "01029498"
+assert message(fft(digits("80871224585914546619083218645595"), 100)) == "24176176"
+assert message(fft(digits("19617804207202209144916044189917"), 100)) == "73745418"
+assert message(fft(digits("69317163492948606335995924319873"), 100)) == "52432133"
 
-print(fft([int(x) for x in list("80871224585914546619083218645595")], 100)[:8] == [
-    int(x) for x in list("24176176")
-])
+assert part2(digits("03036732577212944063491565474664")) == "84462026"
+assert part2(digits("02935109699940807407585447034323")) == "78725270"
+assert part2(digits("03081770884921959731165446850517")) == "53553731"
 
-print((
-    "".join(
-        str(x) for x in fft([int(x) for x in list(Input(16).read().strip())], 100)[:8]
-    )
-))
+if __name__ == "__main__":
+    signal = digits(Input(16).read())
+    print(message(fft(signal, 100)))
+    print(part2(signal))
@@ -279,9 +279,8 @@ is the fewest steps necessary to collect all of the keys?
 import string
 from aoc import *
 from inputs import Input
-from collections import deque, namedtuple
-
-State = namedtuple("State", "pos len visited")
+from collections import defaultdict, deque
+from heapq import heappop, heappush
 
 
 def dump(maze):
@@ -306,93 +305,128 @@ def key_bit(k):
     return 1 << (ord(k) - ord("a"))
 
 
+def key_graph(maze):
+    """For each entrance and key, the keys reachable from there, as (where, bit,
+    steps, needs): needs are the keys for the doors on the way, and any other
+    keys passed on the way, which we may as well go to first. Doors with no
+    key in the maze are left open."""
+    keys = {p: key_bit(k) for p, k in maze.items() if k in string.ascii_lowercase}
+    present = sum(keys.values())
+    graph = {}
+    for start in [p for p, k in maze.items() if k == "@"] + list(keys):
+        reach = []
+        seen = {start}
+        frontier = deque([(start, 0, 0)])
+        while frontier:
+            pos, steps, needs = frontier.popleft()
+            for n in neighbors4(pos):
+                glyph = maze.get(n, "#")
+                if glyph == "#" or n in seen:
+                    continue
+                seen.add(n)
+                need = needs
+                if glyph in string.ascii_uppercase:
+                    need |= key_bit(glyph.lower()) & present
+                elif n in keys:
+                    reach.append((n, keys[n], steps + 1, need))
+                    need |= keys[n]
+                frontier.append((n, steps + 1, need))
+        graph[start] = reach
+    return graph
+
+
+def spanning(apart, nodes):
+    "The weight of a minimum spanning tree of nodes, apart[a][b] steps apart."
+    first, *rest = nodes
+    link = {n: apart[first][n] for n in rest}  # cheapest edge from the tree so far
+    total = 0
+    while link:
+        n = min(link, key=link.get)
+        total += link.pop(n)
+        for m, steps in link.items():
+            link[m] = min(steps, apart[n][m])
+    return total
+
+
 def solve(maze, debug=False):
-    keys = set(p for p, k in maze.items() if k in string.ascii_lowercase)
-    doors = set(p for p, k in maze.items() if k in string.ascii_uppercase)
-    robots = tuple(p for p, k in maze.items() if k == "@")
-    key_bits = dict(
-        (k, key_bit(k)) for k in maze.values() if k in string.ascii_lowercase
-    )
-    all_bits = sum(key_bits.values())
-
-    seen = set()
-    queue = deque([State(robots, 0, 0)])
-    while queue:
-        state = queue.popleft()
-        if state.visited == all_bits:
+    """Fewest steps for the robots at the entrances to collect all the keys: an
+    A* search over where the robots are (at an entrance or a key) and which
+    keys they have, moving one robot at a time to a key it can reach. A robot
+    has to get to the nearest key left in its vault, and then at least walk a
+    spanning tree of the keys left, so the heuristic is the sum of those; if
+    robots share a vault, there is none, and it's Dijkstra's algorithm."""
+    graph = key_graph(maze)
+    places = list(graph)
+    index = {p: i for i, p in enumerate(places)}
+    edges = [
+        [(index[there], bit, dist, needs) for there, bit, dist, needs in graph[p]]
+        for p in places
+    ]
+    apart = [{there: steps for there, _, steps, _ in e} for e in edges]
+    nearest = [sorted((steps, bit) for _, bit, steps, _ in e) for e in edges]
+    at = {bit: there for e in edges for there, bit, _, _ in e}
+    robots = tuple(index[p] for p, k in maze.items() if k == "@")
+    vaults = [sum(bit for _, bit, _, _ in edges[robot]) for robot in robots]
+    shared = any(a & b for i, a in enumerate(vaults) for b in vaults[:i])
+    everything = sum(key_bit(k) for k in maze.values() if k in string.ascii_lowercase)
+    trees = {}  # spanning tree weights, by the keys left in a vault
+
+    def bound(p, left):
+        "The fewest steps for a robot at p to collect the keys left in its vault."
+        if shared or not left:
+            return 0
+        if left not in trees:
+            trees[left] = spanning(apart, [at[bit] for bit in at if left & bit])
+        return trees[left] + next(d for d, bit in nearest[p] if left & bit)
+
+    best = {(robots, 0): 0}
+    # The keys held each time the robots were at some positions, and how far they'd
+    # come: a state is no better than one with a key more at the same positions
+    # and no further. With one robot, checking costs more than it saves.
+    several = len(robots) > 1
+    settled = defaultdict(dict)
+    bits = [1 << i for i in range(everything.bit_length()) if everything >> i & 1]
+    missing = cache(lambda have: [bit for bit in bits if not have & bit])
+    options = {}  # the keys a robot can go for next, by where it is and keys held
+    h = sum(bound(robot, vault) for robot, vault in zip(robots, vaults))
+    frontier = [(h, 0, robots, 0)]
+    while frontier:
+        f, steps, pos, have = heappop(frontier)
+        if have == everything:
             if debug:
-                print("DONE", state, [maze[p] for p in state.pos])
-            return state.len
-        blocked = False
-        opened = False
-        opened_bits = 0
-        moves = [
-            (move, robot)
-            for robot in state.pos
-            for move in neighbors4(robot)
-            if maze.get(move, "#") != "#"
-        ]
-        moves = sorted(
-            moves, key=lambda tpl: maze.get(tpl[0], "#") not in string.ascii_lowercase
-        )
-        for n, robot in moves:
-            glyph = maze.get(n)
-            seen_key = (n, state.visited)
-            if seen_key in seen:
-                continue
-            if (
-                glyph in string.ascii_uppercase
-                and (state.visited & key_bit(glyph.lower())) == 0
-            ):
-                blocked = n
-                continue
-            visited = state.visited
-            if glyph in string.ascii_lowercase:
-                opened = n
-                visited |= key_bit(glyph)
-                if debug:
-                    print("OPEN", n, state.len + 1, glyph, bin(all_bits & ~visited))
-            seen.add(seen_key)
-            newstate = tuple(r if r != robot else n for r in state.pos)
-            queue.append(State(newstate, state.len + 1, visited))
-        if (
-            debug
-            and blocked
-            and opened
-            and maze.get(blocked) == maze.get(opened).upper()
-        ):
-            print(
-                "BL/OP",
-                state.len,
-                blocked,
-                maze.get(blocked),
-                opened,
-                maze.get(opened),
-                [(m, maze[m]) for m, r in moves],
-            )
-
-
-def get_submaze(maze, ul, lr):
-    submaze = {}
-    for y in range(Y(ul), Y(lr) + 1):
-        for x in range(X(ul), X(lr) + 1):
-            submaze[(x, y)] = maze[(x, y)]
-    # Ignore doors without keys
-    keys = set(k for p, k in submaze.items())
-    for p, door in submaze.items():
-        if door not in string.ascii_uppercase:
-            continue
-        if door.lower() not in keys:
-            submaze[p] = "."
-    return submaze
+                print("DONE", steps, [maze[places[p]] for p in pos], len(best))
+            return steps
+        if steps > best[pos, have]:
+            continue  # a stale entry, superseded by a shorter way here
+        if several:
+            seen = settled[pos]
+            if any(seen.get(have | bit, steps + 1) <= steps for bit in missing(have)):
+                continue  # the robots have been here with these keys and more, sooner
+            seen[have] = steps
+        for i, here in enumerate(pos):
+            # Only this robot's part of the heuristic changes as it moves
+            left = vaults[i] & ~have
+            others = f - steps - bound(here, left)
+            if (here, have) not in options:
+                options[here, have] = [
+                    (there, bit, dist)
+                    for there, bit, dist, needs in edges[here]
+                    if not have & bit and not needs & ~have
+                ]
+            for there, bit, dist in options[here, have]:
+                state = (pos[:i] + (there,) + pos[i + 1 :], have | bit)
+                if state not in best or steps + dist < best[state]:
+                    best[state] = steps + dist
+                    h = others + bound(there, left & ~bit)
+                    heappush(frontier, (steps + dist + h, steps + dist, *state))
 
 
 def solve2(maze):
+    "Split the vault into four, unless it already is, with a robot in each."
     robots = [p for p, k in maze.items() if k == "@"]
-    size = max(p for p in maze.keys())
-    heart = None
     if len(robots) == 1:
-        heart = robot = robots[0]
+        maze = dict(maze)
+        robot = robots[0]
         for dx, dy, g in (
             (-1, -1, "@"),
             (0, -1, "#"),
@@ -405,24 +439,7 @@ def solve2(maze):
             (1, 1, "@"),
         ):
             maze[(X(robot) + dx, Y(robot) + dy)] = g
-        # dump(maze)
-    else:
-        heart = (X(min(robots)) + 1, Y(min(robots)) + 1)
-    print(robots, size, heart)
-    hx, hy = heart
-    mx, my = size
-    ans = 0
-    for ul, lr in (
-        (origin, heart),
-        ((hx, 0), (mx, hy)),
-        ((0, hy), (hx, my)),
-        ((hx, hy), size),
-    ):
-        submaze = get_submaze(maze, ul, lr)
-        # print(ul, lr)
-        # dump(submaze)
-        ans += solve(submaze)
-    return ans
+    return solve(maze)
 
 
 EX0 = parse(
@@ -472,23 +489,82 @@ EX3 = parse(
 #o#m..#i#jk.#
 #############""".strip().splitlines()
 )
-# dump(EX3)
-# assert solve2(EX3) == 72, solve2(EX3)
+assert solve2(EX3) == 72, solve2(EX3)
+
+EX4 = parse(
+    """
+#################
+#i.G..c...e..H.p#
+########.########
+#j.A..b...f..D.o#
+########@########
+#k.E..a...g..B.n#
+########.########
+#l.F..d...h..C.m#
+#################""".strip().splitlines()
+)
+assert solve(EX4) == 136, solve(EX4)
+
+EX5 = parse(
+    """
+#######
+#a.#Cd#
+##...##
+##.@.##
+##...##
+#cB#Ab#
+#######""".strip().splitlines()
+)
+assert solve2(EX5) == 8, solve2(EX5)
+
+# A bigger vault, split four ways: slow without a good heuristic
+EX6 = parse(
+    """
+#########################################
+#v....#......Z......#.......#w#...#....g#
+###.#.###.#.#########.#####.#.#.#.#.#.###
+#...#...#n#.#.......#...#...#.#.#...#...#
+#.#####.###.#.#####.#.#.#.###.#.#######.#
+#.#...#.#...#....d#.#.#.#.....#...#C....#
+#.#.#.#.#.#####.###.#.#.#########.#S###.#
+#.#f#...#.....#.#...#.#...........#.#m#.#
+#.###.###.#.#.#.#.#.#.#############.#.#.#
+#...#.#x..#.#i#.#.#.#..y#.....#...#.#...#
+###.#.###.#.###.#.#.#.###.###.#.#.#.#.###
+#...#...#c#.....#.#.#.#.F.#.#.#.#.#.#.#p#
+#.#####.###.#####.#.#.#.###.#.#.#.#.#.#.#
+#.#...#...#...#...#.#.#.#.....#.#...#...#
+#.#.#.###.#####.###.#.#.###.###.#######T#
+#...#...#.......#...#.#...#.#...#...#RK.#
+#.#####.#########.###.###.#.#.###.###.###
+#.#.....#r..........#.#...#...#.......#q#
+#.#.###################.#######.#######.#
+#.#.....................#...............#
+###################.@.###################
+#...#.......#.....#.......#.............#
+###.#.###.#.#####.#.#####.#.#####.#####.#
+#..Q#.#...#.......#.#.....#.....#b#...#.#
+#.###.#.#######.###.#.#####.###.###.#.#.#
+#.#...#...#.V...#...#.#...#...#.....#.#.#
+#.#.#####E#.#####.###.#.#####.#######.#.#
+#......k#.#.#...#.#.#.#.#...#.#u....#X#.#
+#########.#.#.#.#.#.#.#G#P#.#.###.#.#.#.#
+#A......Y.#.#.#.#...#.#...#...#...#.#.#o#
+#.#########O#.#.###.#.#####.###.###.#.###
+#.#t#UL.#.....#h#...#.....#.....#z#.#...#
+#.#.#B#.#.#######.#######.#######.#.###W#
+#.#...#...#N..#...#.#.....#.........#...#
+#.#####H###.#.#.###.#.#####.#########.###
+#.#...#l#...#...#...#.#...#.D..e#.I.#...#
+#.#.#.###.#######.#.#.#.#.#######.#.###.#
+#...#.#...#...#j..#.#...#.......#.#...#.#
+#.###.#.###.#.#####.###########.#.###.#.#
+#..s#.......#.......#........M..J.#a....#
+#########################################""".strip().splitlines()
+)
+assert solve2(EX6) == 908, solve2(EX6)
 
 if __name__ == "__main__":
     maze = parse(Input(18).read().strip().splitlines())
     print(solve(maze))
-    robot = next(p for p, k in maze.items() if k == "@")
-    for dx, dy, g in (
-        (-1, -1, "@"),
-        (0, -1, "#"),
-        (1, -1, "@"),
-        (-1, 0, "#"),
-        (0, 0, "#"),
-        (1, 0, "#"),
-        (-1, 1, "@"),
-        (0, 1, "#"),
-        (1, 1, "@"),
-    ):
-        maze[(X(robot) + dx, Y(robot) + dy)] = g
     print(solve2(maze))
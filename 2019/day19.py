@@ -126,103 +126,187 @@ class Tractor(Intcode):
             idx += 50
 
 
-def part1(tape, debug=False):
-    total = 0
-    for y in range(50):
-        line = ""
-        for x in range(50):
-            result = Tractor(tape, input=[x, y]).run()
-            line += "#" if result == 1 else "."
-        if debug:
-            print(line)
-        total += sum(c == "#" for c in line)
-    return total
+def prober(tape):
+    """A function testing whether (x, y) is in the beam. Each probe forks one drone
+    program that has already run up to the point where it asks for coordinates."""
+    ready = Tractor(tape, input=[])
+    assert ready.run() is None
 
+    def in_beam(x, y):
+        drone = ready.fork()
+        drone.input.extend([x, y])
+        return drone.run() == 1
 
-if __name__ == "__main__":
-    tape = list(vector(Input(19).read().strip()))
-    # print(part1(tape, debug=True))
-
-    def in_beam(x, y, debug=False):
-        result = Tractor(tape, input=[x, y]).run() == 1
-        if debug:
-            print("\r", x, y, result, end="")
-        return result
-
-    def beam_width(x, y, debug=False):
-        low, high = x, 10 ** 10
-        while low < high:
-            x = (low + high) // 2
-            result = in_beam(x, y)
-            if debug > 1:
-                print("WIDTH", y, low, high, x, result)
-            if result and low != x:
-                low = x
+    return in_beam
+
+
+class Beam(object):
+    """The beam as seen through a probe function in_beam(x, y), remembering every
+    point it has probed. Each row of the beam is one run of points, and both its
+    edges move right (or stay put) from one row to the next, so a row's edges can
+    be found in a few probes from those of the row before, or from the beam's
+    slope. many(points), if given, probes a list of points at once (say across a
+    process pool) for batch()."""
+
+    def __init__(self, in_beam, many=None):
+        self.in_beam = in_beam
+        self.many = many
+        self.seen = {}  # (x, y) -> in the beam?
+        self.rows = {}  # y -> (left, right) edges, or None for an empty row
+        self.probes = 0
+
+    def __call__(self, x, y):
+        if (x, y) not in self.seen:
+            self.probes += 1
+            self.seen[x, y] = self.in_beam(x, y)
+        return self.seen[x, y]
+
+    def batch(self, points):
+        "Whether each of the points is in the beam, probing the new ones all at once."
+        points = list(points)
+        new = [point for point in dict.fromkeys(points) if point not in self.seen]
+        if self.many is None:
+            results = [self.in_beam(x, y) for x, y in new]
+        else:
+            results = self.many(new)
+        self.probes += len(new)
+        self.seen.update(zip(new, results))
+        return [self.seen[point] for point in points]
+
+    def track(self, rows, limit=50):
+        """The (left, right) edges of each of the rows in turn (None for an empty
+        one), each row starting from the edges of the last non-empty one. An empty
+        row costs up to limit probes; the rest a couple each, on average."""
+        left = right = 0
+        for y in rows:
+            if y not in self.rows:
+                x = left
+                while x < left + limit and not self(x, y):
+                    x += 1
+                if x == left + limit:
+                    self.rows[y] = None
+                else:
+                    left, right = x, max(x, right)
+                    while self(right + 1, y):
+                        right += 1
+                    while not self(right, y):
+                        right -= 1
+                    self.rows[y] = (left, right)
+            if self.rows[y] is not None:
+                left, right = self.rows[y]
+            yield self.rows[y]
+
+    def row(self, y, reference=50):
+        """The (left, right) edges of row y, searching out from where the nearest
+        row we know the edges of (tracking the rows up to reference if need be)
+        says they'll be, the beam's edges being straight lines from the origin."""
+        if y not in self.rows:
+            known = [r for r in self.rows if r and self.rows[r]]
+            if not known or max(known) < reference - 1:
+                list(self.track(range(reference)))
+                known = [r for r in self.rows if r and self.rows[r]]
+            near = min(known, key=lambda r: abs(r - y))
+            left, right = (edge * y // near for edge in self.rows[near])
+            self.rows[y] = (self._edge(left, y, -1), self._edge(right, y, 1))
+        return self.rows[y]
+
+    def _edge(self, guess, y, direction):
+        """The last x in the beam going in direction along row y, galloping out from
+        the guess (in the beam or not) then bisecting, never left of x = 0."""
+        inside = self(guess, y)
+        step = direction if inside else -direction
+        x = guess
+        while x + step >= 0 and self(x + step, y) == inside:
+            x, step = x + step, step * 2
+        # The edge is between x and x + step, or -1 if that's off the grid: the first
+        # of them on the same side as guess
+        other = max(x + step, -1)
+        low, high = (x, other) if inside else (other, x)
+        while abs(high - low) > 1:
+            mid = (low + high) // 2
+            if self(mid, y):
+                low = mid
             else:
-                high = x - 1
+                high = mid
         return low
 
-    def lower_bound(y, first=0, last=10 ** 10, comp=identity, debug=False):
-        count = last - first
-        while count > 0:
-            step = count // 2
-            mid = first + step
-            value = in_beam(mid, y)
-            if debug:
-                print("LB", first, last, mid, value, comp(value))
-            if comp(value):
-                first = mid + 1
-                count -= step + 1
+    def square(self, size):
+        """The top left corner of the first size x size square to fit in the beam:
+        the first row y whose left edge, size - 1 to the right and size - 1 up, is
+        still in the beam, found by galloping then bisecting on y."""
+
+        def fits(y):
+            bottom, top = self.row(y), self.row(y - size + 1)
+            return bottom and top and top[1] >= bottom[0] + size - 1
+
+        low, high = size - 1, size
+        while not fits(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            mid = (low + high) // 2
+            if fits(mid):
+                high = mid
             else:
-                count = step
-        return first
+                low = mid
+        return self.row(high)[0], high - size + 1
 
-    x, y = 4, 3
-    slen = 100 - 1
-    lines = {}
 
-    while True:
-        while not in_beam(x, y):
-            x += 1
-        if not in_beam(x + slen, y):
-            y += 1
-            continue
-        lb = x
-        ub = lower_bound(y, first=x)
-        if ub - lb < slen:
-            continue
-        # print(
-        #     "LINE",
-        #     (x, y),
-        #     lb,
-        #     ub,
-        #     # " " * lb
-        #     # + "".join(
-        #     #    ("#" if in_beam(x, y) else ".") for x in range(max(0, lb - 1), ub + 1)
-        #     # ),
-        # )
-        width = ub - lb + 1  # beam_width(x, y, debug=True)
-        for dx in range(x, width):
-            if (
-                in_beam(dx, y - slen)
-                and in_beam(dx + slen, y - slen)
-                and in_beam(dx + slen, y)
-            ):
-                x = dx
-                break
-        if all(
-            in_beam(x, y)
-            for x, y in ((x + slen, y), (x, y - slen), (x + slen, y - slen))
-        ):
-            y -= slen
-            break
-        x, y = x + 1, y + 1
-    print(
-        x,
-        y,
-        [
-            in_beam(x, y)
-            for x, y in [(x, y), (x + slen, y), (x, y + slen), (x + slen, y + slen)]
-        ],
+def part1(beam, size=50, debug=False):
+    "How many points in the size x size square at the origin are in the beam."
+    if debug:
+        points = [(x, y) for y in range(size) for x in range(size)]
+        grid = iter(beam.batch(points))
+        for y in range(size):
+            print("".join("#" if next(grid) else "." for x in range(size)))
+    return sum(
+        max(0, min(right, size - 1) - left + 1)
+        for left, right in filter(None, beam.track(range(size)))
+        if left < size
     )
-    print(10000 * x + y)
+
+
+def part2(beam, size=100):
+    x, y = beam.square(size)
+    return 10000 * x + y
+
+
+# A made-up beam, 1.2 to 1.5 times as far across as it is down, with some empty
+# rows at the top, checked against scanning it point by point
+def slanted(x, y):
+    return 12 * y <= 10 * x <= 15 * y
+
+
+def brute_square(in_beam, size):
+    y = size - 1
+    while True:
+        x = next(x for x in count_from(0) if in_beam(x, y))
+        if in_beam(x + size - 1, y - size + 1):
+            return x, y - size + 1
+        y += 1
+
+
+beam = Beam(slanted)
+assert part1(beam) == sum(slanted(x, y) for x in range(50) for y in range(50))
+assert list(beam.track([1, 2, 3])) == [None, (3, 3), (4, 4)]
+probes = beam.probes
+assert beam.square(100) == brute_square(slanted, 100)
+assert beam.probes - probes < 200
+assert Beam(slanted, many=lambda points: [slanted(*p) for p in points]).batch(
+    [(0, 0), (1, 1), (0, 0)]
+) == [True, False, True]
+
+
+# A beam whose left edge is x = 0 all the way down: the drone can't be sent left of it
+def fan(x, y):
+    assert x >= 0, (x, y)
+    return x <= 2 * y
+
+
+assert Beam(fan).row(1000) == (0, 2000)
+
+
+if __name__ == "__main__":
+    tape = list(vector(Input(19).read().strip()))
+    beam = Beam(prober(tape))
+    print(part1(beam))
+    print(part2(beam), beam.probes, "probes")
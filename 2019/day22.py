@@ -198,77 +198,124 @@ After shuffling your new, giant, factory order deck that many times,
 what number is on the card that ends up in position 2020?
 """
 
-from collections import deque
+import numpy as np
+
 from aoc import *
 from inputs import Input
 
 
-def shuffle(insns, ncards, slot=None):
-    cards = list(range(ncards))
-    prev = cards[slot] if slot is not None else None
-    for line in [l.strip() for l in insns]:
-        lastword = line.split(" ")[-1]
-        try:
-            idx = int(lastword)
-        except ValueError:
-            idx = None
+def techniques(insns):
+    "Parse the shuffle instructions, once, into (technique, argument) pairs."
+    for line in insns:
+        line = line.strip()
         if line == "deal into new stack":
-            cards = list(reversed(cards))
+            yield "stack", None
         elif line.startswith("deal with increment "):
-            assert idx > 0
-            result = [None] * ncards
-            i = 0
-            while cards:
-                assert result[i] is None
-                result[i] = cards.pop(0)
-                i = (i + idx) % ncards
-            cards = result
+            yield "increment", int(line.split()[-1])
         elif line.startswith("cut "):
-            cards = cards[idx:] + cards[:idx]
+            yield "cut", int(line.split()[-1])
+        elif line:
+            raise ValueError("Cannot parse " + line)
+
+
+def deal(insns, ncards):
+    "The deck after shuffling, top card first, doing each technique to a NumPy array."
+    cards = np.arange(ncards)
+    for technique, n in techniques(insns):
+        if technique == "stack":
+            cards = cards[::-1]
+        elif technique == "cut":
+            cards = np.roll(cards, -n)
         else:
-            assert False, "Cannot parse " + line
-        if slot is not None:
-            print(
-                "BF: slot={} prev={} curr={} insn={}".format(
-                    slot, prev, cards[slot], line
-                )
-            )
-            prev = cards[slot]
+            dealt = np.empty_like(cards)
+            dealt[np.arange(ncards) * n % ncards] = cards
+            cards = dealt
     return cards
 
 
-def shuffle2(insns, ncards, track, debug=False):
-    for line in [l.strip() for l in insns]:
-        lastword = line.split(" ")[-1]
-        prev = track
-        try:
-            idx = int(lastword)
-        except ValueError:
-            idx = None
-        if line == "deal into new stack":
-            track = ncards - track - 1
-        elif line.startswith("deal with increment "):
-            assert idx > 0
-            track = (idx * track) % ncards
-        elif line.startswith("cut "):
-            if idx > 0:
-                track += ncards - idx
+class Shuffle(object):
+    """A shuffle of a deck of n cards, in which the card at position x ends up at
+    position (a * x + b) % n. Every technique is one of these, and so is doing
+    one shuffle then another (then), the same shuffle k times (**) and undoing
+    a shuffle (inverse, when a is coprime to n, as it is for a prime n)."""
+
+    def __init__(self, a, b, n):
+        self.a, self.b, self.n = a % n, b % n, n
+
+    @classmethod
+    def compile(cls, insns, n):
+        "The shuffle done by the instructions, in one."
+        shuffle = cls(1, 0, n)
+        for technique, k in techniques(insns):
+            if technique == "stack":
+                step = cls(-1, -1, n)
+            elif technique == "increment":
+                step = cls(k, 0, n)
             else:
-                track -= idx
-            track = track % ncards
-        else:
-            assert False, "Cannot parse " + line
-        if debug:
-            print("MA: prev={} track={} insn={}".format(prev, track, line))
-    return track
+                step = cls(1, -k, n)
+            shuffle = shuffle.then(step)
+        return shuffle
+
+    def __call__(self, x):
+        "Where the card at position x ends up."
+        return (self.a * x + self.b) % self.n
+
+    def then(self, other):
+        "This shuffle, followed by other."
+        return Shuffle(other.a * self.a, other.a * self.b + other.b, self.n)
+
+    def __pow__(self, k):
+        "This shuffle done k times (undone, for negative k), by repeated squaring."
+        if k < 0:
+            return self.inverse() ** -k
+        result, square = Shuffle(1, 0, self.n), self
+        while k:
+            if k & 1:
+                result = result.then(square)
+            square, k = square.then(square), k >> 1
+        return result
+
+    def inverse(self):
+        "The shuffle that puts the cards back."
+        a = pow(self.a, -1, self.n)
+        return Shuffle(a, -a * self.b, self.n)
+
+    def deck(self):
+        "The deck after shuffling a factory-order deck, top card first (small n only)."
+        if self.n > 2**31:
+            raise ValueError("{} cards is too many to lay out".format(self.n))
+        cards = np.arange(self.n)
+        deck = np.empty_like(cards)
+        deck[(self.a * cards + self.b) % self.n] = cards
+        return deck
+
+    def __eq__(self, other):
+        return (self.a, self.b, self.n) == (other.a, other.b, other.n)
+
+    def __repr__(self):
+        return "Shuffle({}, {}, {})".format(self.a, self.b, self.n)
+
+
+def part1(insns, ncards=10007, card=2019):
+    return Shuffle.compile(insns, ncards)(card)
+
+
+def part2(insns, ncards=119315717514047, times=101741582076661, position=2020):
+    "Which card ends up at position after shuffling times times: undo the shuffles."
+    return (Shuffle.compile(insns, ncards) ** times).inverse()(position)
 
 
 def check(ex):
     insns = ex.splitlines()
     answer = insns[-1].replace("Result: ", "")
     answer = [int(x) for x in answer.split(" ")]
-    result = shuffle(insns[:-1], 10)
-    assert result == answer, (insns, result, answer)
+    assert deal(insns[:-1], 10).tolist() == answer, (insns, answer)
+    shuffle = Shuffle.compile(insns[:-1], 10)
+    assert shuffle.deck().tolist() == answer, (insns, shuffle, answer)
+    # Shuffling twice, and undoing it, with a prime number of cards
+    shuffle = Shuffle.compile(insns[:-1], 10007)
+    assert (shuffle**2).deck().tolist() == deal(insns[:-1] * 2, 10007).tolist()
+    assert (shuffle**5).then(shuffle**-5) == Shuffle(1, 0, 10007)
 
 
 EXAMPLES = [
@@ -302,21 +349,6 @@ for ex in EXAMPLES:
 
 if __name__ == "__main__":
     insns = Input(22).read().splitlines()
-    result = shuffle(insns, 10007, slot=2019)
-    print(result.index(2019))
-    assert shuffle2(insns, 10007, 2019) == result.index(2019)
-
-    import sys
-
-    sys.exit(0)
-
-    seen = {}
-    track = 2020
-    for i in range(101741582076661):
-        track = shuffle2(insns, 119315717514047, track)
-        if track in seen:
-            print(i, track, seen[track])
-            break
-        if i % 1000 == 0:
-            print(i, track)
-        seen[track] = i
+    print(part1(insns))
+    assert deal(insns, 10007).tolist().index(2019) == part1(insns)
+    print(part2(insns))
@@ -49,13 +49,14 @@ Y value of the first packet sent to address 255?
 
 from aoc import *
 from inputs import Input
-from intcode import Intcode
+from intcode import Intcode, Network
 
 
 class CPU(Intcode):
     def __init__(self, network, nat, addr, tape):
         super(CPU, self).__init__(tape, input=[addr])
         self.network_ = network
+        self.nat_ = nat
         self.addr_ = addr
 
     def on_output(self):
@@ -63,37 +64,32 @@ class CPU(Intcode):
             return
         dest, x, y = self.output[-3:]
         # print("OUT", self.addr_, self.output[-3:])
-        if dest < len(self.network_):
-            peer = self.network_[dest]
-            peer.input.extend(self.output[-2:])
+        if dest < len(self.network_.machines):
+            self.network_.send(self.network_.machines[dest], x, y)
             return
-        if nat[0] is None:
+        if self.nat_[0] is None:
             print(y)
-        nat[0] = (x, y)
+        self.nat_[0] = (x, y)
 
 
 if __name__ == "__main__":
     tape = list(vector(Input(23).read().strip()))
-    network = [None] * 50
+    network = Network()
     nat = [None]
     prev_nat = (None, None)
     for addr in range(50):
-        network[addr] = CPU(network, nat, addr, tape)
+        network.add(CPU(network, nat, addr, tape))
     while True:
-        waiting = []
-        for cpu in network:
-            val = cpu.run()
-            if val is None:
-                waiting.append(cpu)
-        if len(waiting) == len(network):
-            if nat[0] == None:
-                for cpu in waiting:
-                    cpu.input.append(-1)
-                continue
-            # print("IDLE", prev_nat, nat)
-            x, y = nat[0]
-            network[0].input.extend([x, y])
-            if y == prev_nat[1]:
-                break
-            prev_nat = nat[0]
+        # Deliver packets until every computer is waiting on an empty queue
+        network.run()
+        if nat[0] is None:
+            for cpu in network.machines:
+                network.send(cpu, -1)
+            continue
+        # print("IDLE", prev_nat, nat)
+        x, y = nat[0]
+        network.send(network.machines[0], x, y)
+        if y == prev_nat[1]:
+            break
+        prev_nat = nat[0]
     print(prev_nat[1])
@@ -282,8 +282,9 @@ In this example, after 10 minutes, a total of 99 bugs are present.
 Starting with your scan, how many bugs are present after 200 minutes?
 """
 
+import numpy as np
 
-from collections import defaultdict
+from aoc import Automaton
 
 
 def parse(input):
@@ -296,94 +297,83 @@ def parse(input):
     return bits
 
 
-def make_neighbors():
-    nb = defaultdict(set)
-    for idx in range(25):
-        if idx == 12:
-            continue
-        x, y = idx % 5, idx // 5
-        for dx, dy in ((-1, 0), (0, -1), (1, 0), (0, 1)):
-            xx, yy = x + dx, y + dy
-            if xx >= 0 and xx < 5 and yy >= 0 and yy < 5 and (xx, yy) != (2, 2):
-                oidx = 5 * yy + xx
-                nb[idx].add((oidx, 0))
-        if x == 0:
-            nb[idx].add((11, -1))
-            nb[11].add((idx, 1))
-        if y == 0:
-            nb[idx].add((7, -1))
-            nb[7].add((idx, 1))
-        if x == 4:
-            nb[idx].add((13, -1))
-            nb[13].add((idx, 1))
-        if y == 4:
-            nb[idx].add((17, -1))
-            nb[17].add((idx, 1))
-    for idx in sorted(nb):
-        # x, y = idx % 5, idx // 5
-        # print("NB", idx, (x, y), sorted(nb[idx]), n2)
-        pass
-    return nb
-
-
-NEIGH = make_neighbors()
-
-
-def neighbors(idx):
-    x, y = idx % 5, idx // 5
-    for x, y in ((x - 1, y), (x, y - 1), (x + 1, y), (x, y + 1)):
-        if x >= 0 and x < 5 and y >= 0 and y < 5:
-            yield 5 * y + x
+# A bug survives with exactly one adjacent bug; an empty tile is infested by one or two
+BUGS = Automaton.from_rule(
+    lambda bug, n: n == 1 if bug else n in (1, 2), states=2, neighborhood=4
+)
+BIT = 1 << np.arange(25, dtype=np.int64)
 
 
 def evolve(bits):
-    result = 0
-    for idx in range(25):
-        mask = 1 << idx
-        n = sum((bits & (1 << x)) != 0 for x in neighbors(idx))
-        if bits & mask:
-            if n == 1:
-                result |= mask
-        else:
-            if n in (1, 2):
-                result |= mask
-    return result
-
-
-def count_bits(bits):
-    result = 0
-    while bits:
-        if bits & 1:
-            result += 1
-        bits >>= 1
-    return result
+    grid = ((bits & BIT) != 0).astype(np.uint8).reshape(5, 5)
+    return int(BIT[BUGS.step(grid).ravel() != 0].sum())
+
+
+# Boards of the 25 tiles, one bit each, as for biodiversity
+FULL = np.uint32((1 << 25) - 1)
+CENTER = np.uint32(1 << 12)
+TOP, BOTTOM = np.uint32(0x1F), np.uint32(0x1F << 20)
+LEFT = np.uint32(sum(1 << 5 * y for y in range(5)))
+RIGHT = LEFT << np.uint32(4)
+# The tiles around the center, and the edge of the level inside each one touches
+EDGES = [(7, TOP), (11, LEFT), (13, RIGHT), (17, BOTTOM)]
+
+
+def add(planes, board):
+    """Count board's bits into the counts of each tile, held as bit planes: the
+    ones and twos bits, and whether it got to four or more."""
+    ones, twos, many = planes
+    carry = ones & board
+    return ones ^ board, twos ^ carry, many | (twos & carry)
+
+
+def evolve_levels(world):
+    """One minute of the recursive grids in world, an array of levels from the
+    outermost in, each a board. Every level is stepped at once: the level
+    outside each is the array shifted down one, the level inside up one."""
+    outer, inner = np.zeros_like(world), np.zeros_like(world)
+    outer[1:], inner[:-1] = world[:-1], world[1:]
+    one, two = np.uint32(1), np.uint32(2)
+    # The tiles around the center see a whole edge of the level inside
+    planes = [np.zeros_like(world) for _ in range(3)]
+    for tile, edge in EDGES:
+        n = np.bitwise_count(inner & edge).astype(np.uint32) << np.uint32(tile)
+        bit = one << np.uint32(tile)
+        planes[0] |= n & bit
+        planes[1] |= (n >> one) & bit
+        planes[2] |= (n >> two) & bit
+    # Each edge tile sees the tile next to the center in the level outside
+    (up, left, right, down) = ((outer >> np.uint32(tile)) & one for tile, _ in EDGES)
+    planes = add(planes, up * TOP | down * BOTTOM)
+    planes = add(planes, left * LEFT | right * RIGHT)
+    planes = add(planes, (world << np.uint32(5)) & FULL)
+    planes = add(planes, world >> np.uint32(5))
+    planes = add(planes, (world << one) & ~LEFT & FULL)
+    planes = add(planes, (world >> one) & ~RIGHT)
+    ones, twos, many = planes
+    # A bug lives on with one neighbour; an empty tile is infested by one or two
+    alive = (ones ^ twos) & ~many & ~(twos & world)
+    return alive & FULL & ~CENTER
 
 
 def evolve_recursive(bits, rounds=200, debug=False):
-    world = defaultdict(int)
-    world[0] = bits
-    for r in range(rounds):
-        result = defaultdict(int)
-        levels = list(world.keys())
-        levels += [min(levels) - 1, max(levels) + 1]
-        for level in sorted(levels):
-            bits = world[level]
-            for idx in range(25):
-                n = sum(world[level + dl] & (1 << x) != 0 for x, dl in NEIGH[idx])
-                mask = 1 << idx
-                out = 0
-                if bits & mask:
-                    if n == 1:
-                        out = mask
-                elif n in (1, 2):
-                    out = mask
-                result[level] |= out
-            if debug and r == rounds - 1 and result[level]:
-                render(result[level], "LEVEL:{}:{}".format(level, r + 1))
-        world = result
+    """The levels after rounds minutes, starting from bits on level 0, as an
+    array of boards from the outermost level in. Bugs spread a level further
+    out or in at most every other minute, which bounds the levels allocated;
+    each minute steps only the levels with bugs and an empty one either side."""
+    depth = (rounds + 1) // 2 + 1
+    world = np.zeros(2 * depth + 1, dtype=np.uint32)
+    world[depth] = bits & ~int(CENTER)
+    lo, hi = depth - 1, depth + 2
+    for _ in range(rounds):
+        world[lo:hi] = evolve_levels(world[lo:hi])
+        lo -= bool(world[lo])
+        hi += bool(world[hi - 1])
+    if debug:
+        for level, bits in enumerate(world, -depth):
+            if bits:
+                render(int(bits), "LEVEL:{}:{}".format(level, rounds))
     return world
-    count = sum(count_bits(bits) for bits in world.values())
-    return count
 
 
 def render(bits, label):
@@ -445,7 +435,7 @@ EX2 = """
 """
 
 R2 = evolve_recursive(parse(EX2.strip().splitlines()), 10)
-assert sum(count_bits(b) for b in R2.values()) == 99, R2
+assert np.bitwise_count(R2).sum() == 99, R2
 
 state = EXAMPLE[0]
 for expect in EXAMPLE[1:]:
@@ -468,4 +458,4 @@ if __name__ == "__main__":
     # Solve the recursive problem
     bits = parse(Input(24).read().splitlines())
     world = evolve_recursive(bits, rounds=200)
-    print(sum(count_bits(b) for b in world.values()))
+    print(np.bitwise_count(world).sum())
@@ -66,7 +66,7 @@ class Adventure(Intcode):
             if line.startswith("#"):
                 continue
             self.input.extend(ord(x) for x in line + "\n")
-        return self.input.pop(0)
+        return self.input.popleft()
 
     def on_output(self):
         print(chr(self.output[-1]), end="")
@@ -172,6 +172,14 @@ outputs one number, the diagnostic code.
 What is the diagnostic code for system ID 5?
 """
 
+import copy
+import os
+import sys
+from array import array
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 from aoc import vector
 
 ADD, MUL, STO, OUT, JNZ, JZ, LT, EQ, BASE, BRK = 1, 2, 3, 4, 5, 6, 7, 8, 9, 99
@@ -189,15 +197,260 @@ OPNAME = {
     BRK: "BRK",
 }
 
+# Memory beyond the end of the program that is preallocated along with it;
+# anything above that lives in a sparse dict.
+HEADROOM = 4096
+
+
+def memory(tape, size):
+    "A flat block of `size` words holding tape: 64-bit if every value fits, else a list."
+    try:
+        mem = array("q", tape)
+    except OverflowError:
+        mem = list(tape)
+    mem.extend([0] * (size - len(mem)))
+    return mem
+
+
+################ Threaded code: each instruction decoded once into a closure
+#
+# An instruction's closure takes the machine, does its work and returns the
+# next ip, or -1 to stop the run loop (halted, or waiting for input). Nothing
+# else about the machine is bound in, so forks of a machine share closures. The closure source only
+# depends on the instruction word (opcode and modes) and on which of its
+# position-mode operands fall outside the preallocated memory, so each shape
+# is compiled once into a factory that binds the operands of one instruction.
+
+
+def _read(k, mode, far):
+    p = "p{}".format(k)
+    if mode == 1:
+        return p
+    if mode == 2:
+        i = "i{}".format(k)
+        return "(mem[{0}] if ({0} := self._base + {1}) < size else high.get({0}, 0))".format(
+            i, p
+        )
+    return "high.get({}, 0)".format(p) if far else "mem[{}]".format(p)
+
+
+def _write(k, mode, far, value):
+    p = "p{}".format(k)
+    if mode == 2:
+        return [
+            "w = self._base + {}".format(p),
+            "if w < size:",
+            "    mem[w] = {}".format(value),
+            "    if covered[w]:",
+            "        self._invalidate(w)",
+            "else:",
+            "    high[w] = {}".format(value),
+        ]
+    if far:
+        return ["high[{}] = {}".format(p, value)]
+    return [
+        "mem[{}] = {}".format(p, value),
+        "if covered[{}]:".format(p),
+        "    self._invalidate({})".format(p),
+    ]
+
+
+# The value each three-operand instruction stores, given its two inputs
+_ALU = {
+    ADD: "{} + {}",
+    MUL: "{} * {}",
+    LT: "1 if {} < {} else 0",
+    EQ: "1 if {} == {} else 0",
+}
+
+
+def _body(opcode, modes, far):
+    r1, r2, _ = (_read(k + 1, modes[k], far[k]) for k in range(3))
+    if opcode in _ALU:
+        value = _ALU[opcode].format(r1, r2)
+        return _write(3, modes[2], far[2], value) + ["return nxt"]
+    if opcode == STO:
+        where = "self._base + p1" if modes[0] == 2 else "p1"
+        lines = ["v = self.on_input()", "if v is None:", "    self.ip = ip"]
+        lines += ["    return -1", "try:"]
+        lines += ["    " + line for line in _write(1, modes[0], far[0], "v")]
+        lines += ["except OverflowError:", "    self._widen()"]
+        lines += ["    self.poke({}, v)".format(where), "return nxt"]
+        return lines
+    if opcode == OUT:
+        return ["self._output.append({})".format(r1), "self.on_output()", "return nxt"]
+    if opcode == JNZ:
+        return ["return {} if {} else nxt".format(r2, r1)]
+    if opcode == JZ:
+        return ["return nxt if {} else {}".format(r1, r2)]
+    if opcode == BASE:
+        return ["self._base += {}".format(r1), "return nxt"]
+    if opcode == BRK:
+        return ["self._done = True", "self.ip = ip", "return -1"]
+
+
+_FACTORIES = {}
+
+
+def _factory(insn, far):
+    "The closure factory for instruction word insn, compiled on first use."
+    key = (insn, far)
+    make = _FACTORIES.get(key)
+    if make is None:
+        opcode = insn % 100
+        modes = (insn // 100 % 10, insn // 1000 % 10, insn // 10000 % 10)
+        body = _body(opcode, modes, far)
+        lines = ["def make(size, ip, nxt, p1, p2, p3):", "    def op(self):"]
+        for name, attr in (("mem", "mem"), ("high", "high"), ("covered", "_covered")):
+            if any(name in line for line in body):
+                lines.append("        {} = self.{}".format(name, attr))
+        lines += ["        " + line for line in body]
+        lines += ["    return op"]
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        make = _FACTORIES[key] = namespace["make"]
+    return make
+
+
+################ Superinstructions: whole loops run in one step
+#
+# Compiled Intcode is full of do-while loops that bump a few cells by fixed
+# amounts and go round again until a counter reaches a bound, such as this
+# multiplication by repeated addition:
+#
+#   L: ADD acc, x -> acc; ADD i, 1 -> i; LT i, n -> t; JNZ t, L
+#
+# Once the number of trips round the loop is known, every cell it bumps can be
+# set with one multiplication.  The shape is matched when the loop is first
+# decoded; whether it is safe to fuse (the cells are distinct, the steps and
+# bound don't change inside the loop, and the loop doesn't write to its own
+# code) can depend on the relative base, so that is checked each time it runs.
+# Whenever it isn't, the loop runs an instruction at a time as usual.
+
+# How the counter and bound of a loop compare while it goes round again, by the
+# compare instruction, whether the counter is its first operand, and the jump
+STAY = {
+    (LT, True, JNZ): "<",
+    (LT, True, JZ): ">=",
+    (LT, False, JNZ): ">",
+    (LT, False, JZ): "<=",
+    (EQ, True, JNZ): "==",
+    (EQ, False, JNZ): "==",
+    (EQ, True, JZ): "!=",
+    (EQ, False, JZ): "!=",
+}
+
+
+def _operands(mem, ip, n):
+    "The first n (parameter, mode) pairs of the instruction at ip."
+    insn = mem[ip]
+    return [(mem[ip + k], insn // 10 ** (k + 1) % 10) for k in range(1, n + 1)]
+
+
+def _loop(mem, size, L):
+    """The loop idiom at L, if there is one, as (end, updates, compare, jump): updates
+    are (cell, step) operand pairs, each of which adds its step to its cell; compare
+    is (opcode, x, y, t) and jump is the opcode that goes back to L while t says so."""
+    updates, ip = [], L
+    while ip + 4 <= size and mem[ip] % 100 == ADD:
+        a, b, cell = _operands(mem, ip, 3)
+        if cell[1] == 1 or cell not in (a, b):
+            return None
+        updates.append((cell, b if a == cell else a))
+        ip += 4
+    if not updates or ip + 7 > size or mem[ip] % 100 not in (LT, EQ):
+        return None
+    x, y, t = _operands(mem, ip, 3)
+    jump = mem[ip + 4] % 100
+    if t[1] == 1 or jump not in (JNZ, JZ) or _operands(mem, ip + 4, 2) != [t, (L, 1)]:
+        return None
+    return ip + 7, updates, (mem[ip] % 100, x, y, t), jump
+
+
+def _trips(stay, c0, step, n):
+    """How many times round a do-while loop whose counter starts at c0 and goes up by
+    step each time, going round again while `counter stay n`; None if it never stops."""
+    c1 = c0 + step
+    if not {"<": c1 < n, ">=": c1 >= n, ">": c1 > n, "<=": c1 <= n}.get(
+        stay, (c1 == n) == (stay == "==")
+    ):
+        return 1
+    if stay == "<" and step > 0:
+        return -((c0 - n) // step)
+    if stay == "<=" and step > 0:
+        return (n - c0) // step + 1
+    if stay == ">" and step < 0:
+        return -((c0 - n) // step)
+    if stay == ">=" and step < 0:
+        return (n - c0) // step + 1
+    if stay == "!=" and step and (n - c0) % step == 0 and (n - c0) // step > 0:
+        return (n - c0) // step
+    return None
+
+
+def _fused(mem, size, plain, L, end, updates, compare, jump):
+    """An instruction closure for the loop at L that runs all the way round it at
+    once, or runs plain, the closure for the instruction at L, when it can't."""
+    words = list(mem[L:end])
+    opcode, x, y, t = compare
+
+    def op(self):
+        mem, covered = self.mem, self._covered
+        if list(mem[L:end]) != words:
+            return plain(self)
+        base = self._base
+        where = lambda p, mode: p + base if mode == 2 else p
+        cells = [where(*cell) for cell, _ in updates] + [where(*t)]
+        if len(set(cells)) < len(cells):
+            return plain(self)
+        for w in cells:
+            if not 0 <= w < size or L <= w < end:
+                return plain(self)
+
+        def value(p, mode):
+            if mode == 1:
+                return p
+            w = where(p, mode)
+            return mem[w] if 0 <= w < size and w not in cells else None
+
+        steps = [value(*step) for _, step in updates]
+        xs, ys = where(*x) if x[1] != 1 else None, where(*y) if y[1] != 1 else None
+        counter, bound = (xs, y) if xs in cells else (ys, x)
+        n = value(*bound)
+        if None in steps or n is None or counter not in cells[:-1]:
+            return plain(self)
+        c = cells.index(counter)
+        k = _trips(STAY[opcode, counter == xs, jump], mem[counter], steps[c], n)
+        if k is None:
+            return plain(self)
+        values = [mem[w] + k * step for w, step in zip(cells, steps)]
+        values.append(0 if jump == JNZ else 1)
+        if not isinstance(mem, list) and not all(-(2**63) <= v < 2**63 for v in values):
+            raise OverflowError  # run widens memory, then comes back here
+        for w, v in zip(cells, values):
+            mem[w] = v
+            if covered[w]:
+                self._invalidate(w)
+        return end
+
+    return op
+
 
 class Intcode(object):
     def __init__(self, tape, input):
-        self.tape = tape[:]
+        self.size = len(tape) + HEADROOM
+        self.mem = memory(tape, self.size)
+        self.high = {}  # sparse memory at and above self.size
         self.ip = 0
-        self._input = input
+        self._input = deque(input)
         self._output = []
         self._done = False
         self._base = 0
+        self._code = {}  # decoded instruction closures, by address
+        self._covered = bytearray(self.size)  # addresses read by a decoded instruction
+        # Closures decoded by this machine or its forks, by address, along with the
+        # words they were decoded from: a fork only decodes what none has before
+        self._family = {}
 
     def __str__(self):
         return "Intcode(id={:x}, input={}, output={})".format(
@@ -220,7 +473,7 @@ class Intcode(object):
         if len(self._input) == 0:
             # Signal caller need for more input
             return None
-        return self._input.pop(0)
+        return self._input.popleft()
 
     def on_output(self):
         pass
@@ -228,14 +481,107 @@ class Intcode(object):
     def done(self):
         return self._done
 
+    def peek(self, addr):
+        if addr < self.size:
+            return self.mem[addr]
+        return self.high.get(addr, 0)
+
+    def poke(self, addr, val):
+        if addr >= self.size:
+            self.high[addr] = val
+            return val
+        try:
+            self.mem[addr] = val
+        except OverflowError:
+            self._widen()
+            self.mem[addr] = val
+        if self._covered[addr]:
+            self._invalidate(addr)
+        return val
+
+    def snapshot(self):
+        "A copy of the machine's state, for restore()."
+        return (
+            self.mem[:],
+            dict(self.high),
+            self.ip,
+            self._base,
+            self._done,
+            list(self._input),
+            list(self._output),
+            dict(self._code),
+            bytearray(self._covered),
+        )
+
+    def restore(self, snapshot):
+        "Put the machine back in the state it had at snapshot()."
+        mem, high, self.ip, self._base, self._done, input, output, code, covered = (
+            snapshot
+        )
+        self.mem, self.high = mem[:], dict(high)
+        for queue, values in ((self._input, input), (self._output, output)):
+            queue.clear()
+            queue.extend(values)
+        # Instructions decoded from the memory as it was then still hold
+        self._code, self._covered = dict(code), bytearray(covered)
+
+    def fork(self):
+        """An independent copy of this machine, paused where this one is: a search can
+        fork a machine that has run to an interesting point instead of replaying the
+        program to get there. The copy has its own memory and input/output lists, and
+        shares decoded instructions with this one and its other forks; any other
+        attributes of a subclass are shared, as with copy.copy."""
+        clone = copy.copy(self)
+        clone.mem, clone.high = self.mem[:], dict(self.high)
+        clone._input, clone._output = deque(self._input), list(self._output)
+        clone._code, clone._covered = dict(self._code), bytearray(self._covered)
+        return clone
+
+    def _invalidate(self, addr):
+        "Forget decoded instructions that may have read addr, which was just written."
+        code = self._code
+        for ip in range(max(0, addr - 3), addr + 1):
+            code.pop(ip, None)
+
+    def _widen(self):
+        "A value too big for 64 bits: move memory to a list of Python ints."
+        self.mem = list(self.mem)
+
+    def _compile(self, ip):
+        known = self._family.get(ip)
+        if known is not None and self.mem[ip : ip + len(known[0])] == known[0]:
+            words, op = known
+        else:
+            op, words = self._decode(ip)
+            if len(words) == OPLEN[words[0] % 100]:  # not cut off by the end of mem
+                self._family[ip] = (words, op)
+        self._code[ip] = op
+        self._covered[ip : ip + len(words)] = b"\x01" * len(words)
+        return op
+
+    def _decode(self, ip):
+        "A closure for the instruction at ip, and the words it was decoded from."
+        insn = self.mem[ip]
+        opcode = insn % 100
+        valid = insn >= 0 and opcode in OPLEN
+        assert valid, "Invalid instruction ip=%d insn=%s" % (ip, insn)
+        oplen = OPLEN[opcode]
+        params = [self.peek(ip + k) if k < oplen else 0 for k in (1, 2, 3)]
+        far = tuple(
+            insn // (100 * 10**k) % 10 == 0 and params[k] >= self.size for k in range(3)
+        )
+        op = _factory(insn, far)(self.size, ip, ip + oplen, *params)
+        loop = _loop(self.mem, self.size, ip)
+        if loop is not None:
+            op = _fused(self.mem, self.size, op, ip, *loop)
+        return op, self.mem[ip : ip + oplen]
+
     def get(self, addr, mode):
         if mode == 1:
             return addr
         if mode == 2:
             addr += self._base
-        if addr >= len(self.tape):
-            self.tape.extend([0] * (addr - len(self.tape) + 1))
-        return self.tape[addr]
+        return self.peek(addr)
 
     def addr(self, addr, mode):
         if mode == 0:
@@ -247,19 +593,38 @@ class Intcode(object):
         assert "Invalid mode {}".format(mode)
 
     def sto(self, addr, val):
-        if addr >= len(self.tape):
-            self.tape.extend([0] * (addr - len(self.tape) + 1))
-            assert len(self.tape) == addr + 1
-        self.tape[addr] = val
-        return val
+        return self.poke(addr, val)
+
+    def run(self, debug=False, fast=True, profile=None):
+        """Run until the program halts (returning its last output) or needs input that
+        on_input can't supply (returning None; call run again to resume).  The fast path
+        runs pre-decoded instructions; debug=True or fast=False steps the plain
+        interpreter, as does passing a Profile to count what gets executed."""
+        if debug or not fast or profile is not None:
+            return self.interpret(debug, profile)
+        decoded = self._code.get
+        ip = self.ip
+        while not self._done:
+            try:
+                while ip >= 0:
+                    ip = (decoded(ip) or self._compile(ip))(self)
+            except OverflowError:
+                self._widen()  # then retry the instruction that overflowed
+                continue
+            if not self._done:
+                return None
+        return self._output[-1]
 
-    def run(self, debug=False):
+    def interpret(self, debug=False, profile=None):
+        "The reference interpreter: decodes every instruction as it goes."
         while not self._done:
-            insn = self.tape[self.ip]
+            insn = self.peek(self.ip)
             assert insn >= 0
             amode, opcode = insn // 100, insn % 100
             oplen = OPLEN[opcode]
-            args = self.tape[self.ip + 1 : self.ip + oplen]
+            if profile is not None:
+                profile.count(self.ip, opcode)
+            args = [self.peek(self.ip + k) for k in range(1, oplen)]
             assert amode <= 222
             amode = [amode % 10, (amode // 10) % 10, (amode // 100) % 10]
             # parameters with address mode applied
@@ -285,13 +650,16 @@ class Intcode(object):
                 val = self.on_input()
                 if val is None:
                     return val
-                self.sto(addrs[0], val)  # self._input.pop(0))
+                self.sto(addrs[0], val)
             elif opcode == OUT:
                 self._output.append(data[0])
                 self.on_output()
             elif opcode == JNZ or opcode == JZ:
                 val = data[0]
-                if (opcode == JNZ and val) or (opcode == JZ and not val):
+                taken = (opcode == JNZ and val) or (opcode == JZ and not val)
+                if profile is not None:
+                    profile.branch(self.ip, data[1] if taken else None)
+                if taken:
                     self.ip = data[1]
                     oplen = 0
             elif opcode == LT or opcode == EQ:
@@ -311,6 +679,167 @@ class Intcode(object):
         return self._output[-1]
 
 
+class Profile(object):
+    """What a program spent its time on, gathered by Intcode.run(profile=...): how often
+    each address and each opcode was executed, and how often each jump was taken.
+    Running a machine without a profile doesn't pay for any of this."""
+
+    def __init__(self):
+        self.address = Counter()  # instructions executed, by address
+        self.opcode = Counter()  # instructions executed, by opcode
+        self.taken = Counter()  # jumps taken, by address of the jump
+        self.untaken = Counter()  # jumps not taken, by address of the jump
+        self.targets = set()  # addresses that were jumped to
+        self.opcodes = {}  # the opcode last executed at each address
+
+    def count(self, ip, opcode):
+        self.address[ip] += 1
+        self.opcode[opcode] += 1
+        self.opcodes[ip] = opcode
+
+    def branch(self, ip, target):
+        "Record the jump at ip going to target, or falling through if target is None."
+        if target is None:
+            self.untaken[ip] += 1
+        else:
+            self.taken[ip] += 1
+            self.targets.add(target)
+
+    def blocks(self):
+        """The basic blocks that were executed, hottest first, as (instructions
+        executed, entries, [addresses]).  A block starts at the program's entry point, at a jump
+        target, or after a jump or halt; anything else runs straight through to the next
+        instruction."""
+        blocks, block, nxt = [], [], None
+        for ip in sorted(self.address):
+            opcode = self.opcodes[ip]
+            if ip != nxt or ip in self.targets:
+                if block:
+                    blocks.append(block)
+                block = []
+            block.append(ip)
+            nxt = None if opcode in (JNZ, JZ, BRK) else ip + OPLEN[opcode]
+        if block:
+            blocks.append(block)
+        ranked = [
+            (sum(self.address[ip] for ip in block), self.address[block[0]], block)
+            for block in blocks
+        ]
+        return sorted(ranked, reverse=True)
+
+    def report(self, top=10):
+        "A printable summary: the instruction mix, then the hottest basic blocks."
+        total = sum(self.opcode.values())
+        lines = ["{} instructions executed".format(total)]
+        for opcode, n in self.opcode.most_common():
+            lines.append("  {:<4} {:>12} {:6.1%}".format(OPNAME[opcode], n, n / total))
+        lines.append("hottest basic blocks:")
+        for steps, entries, block in self.blocks()[:top]:
+            last = block[-1]
+            jump = ""
+            if last in self.taken or last in self.untaken:
+                jump = "  jump taken {}/{}".format(
+                    self.taken[last], self.taken[last] + self.untaken[last]
+                )
+            lines.append(
+                "  {:>5}-{:<5} {:>12} {:6.1%} {:>10} entries  {}{}".format(
+                    block[0],
+                    last,
+                    steps,
+                    steps / total,
+                    entries,
+                    " ".join(OPNAME[self.opcodes[ip]] for ip in block),
+                    jump,
+                )
+            )
+        return "\n".join(lines)
+
+
+class Channel(deque):
+    """A machine's input queue that another machine writes its output into: each
+    value written wakes the reader on the network."""
+
+    def __init__(self, network, reader, values=()):
+        super().__init__(values)
+        self.network = network
+        self.reader = reader
+
+    def append(self, value):
+        super().append(value)
+        self.network.wake(self.reader)
+
+
+class Network(object):
+    """Intcode machines that talk through their input queues. Machines block when
+    they ask for input that isn't there, and are only resumed once something is
+    sent to them, so the work done is proportional to the messages passed."""
+
+    def __init__(self):
+        self.machines = []
+        self._ready = deque()  # machines with work to do, in wake-up order
+        self._queued = set()  # ids of the machines in _ready
+
+    def add(self, machine):
+        "Add a machine, and let it run until it first blocks."
+        self.machines.append(machine)
+        self.wake(machine)
+        return machine
+
+    def wake(self, machine):
+        if id(machine) not in self._queued and not machine.done():
+            self._queued.add(id(machine))
+            self._ready.append(machine)
+
+    def connect(self, writer, reader):
+        "Feed everything writer outputs into reader's input."
+        reader._input = Channel(self, reader, reader.input)
+        writer.output = reader.input
+
+    def send(self, machine, *values):
+        machine.input.extend(values)
+        self.wake(machine)
+
+    def idle(self):
+        "True when every machine is halted or blocked on an empty input queue."
+        return not self._ready
+
+    def run(self):
+        "Run machines that have input until the whole network is idle."
+        while self._ready:
+            machine = self._ready.popleft()
+            self._queued.discard(id(machine))
+            machine.run()
+
+
+################ Batches: one program, many input vectors, a process per core
+
+_worker_tape = None  # the program, loaded once into each worker process
+
+
+def _load_tape(tape):
+    global _worker_tape
+    _worker_tape = tape
+
+
+def _evaluate(func, vector):
+    return func(_worker_tape, vector)
+
+
+def run_batch(tape, func, vectors, workers=None):
+    """[func(tape, vector) for vector in vectors], spread over a pool of `workers`
+    processes (default: one per CPU; workers=1 runs them here instead). The tape is
+    sent to each worker once, not with every vector, and func must be a module-level
+    function so it can be sent to the workers by name. Module-level asserts should
+    pass workers=1: forked workers would block on the half-imported module."""
+    vectors = list(vectors)
+    if workers == 1:
+        return [func(tape, vector) for vector in vectors]
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers, initializer=_load_tape, initargs=(tape,)) as pool:
+        chunksize = max(1, len(vectors) // (4 * workers))
+        return list(pool.map(partial(_evaluate, func), vectors, chunksize=chunksize))
+
+
 # Kept as string so Black won't expand it to umpteen lines
 EXAMPLE = list(
     vector(
@@ -324,3 +853,81 @@ EXAMPLE = list(
 assert Intcode(EXAMPLE, input=[7]).run() == 999
 assert Intcode(EXAMPLE, input=[8]).run() == 1000
 assert Intcode(EXAMPLE, input=[100]).run() == 1001
+assert Intcode(EXAMPLE, input=[7]).run(fast=False) == 999
+
+# Self-modifying: the loop bumps the operand of the OUT at 0 each time round
+SELFMOD = [104, 0, 1001, 1, 1, 1, 1007, 1, 3, 14, 1005, 14, 0, 99, 0]
+for fast in (False, True):
+    cpu = Intcode(SELFMOD, input=[])
+    assert cpu.run(fast=fast) == 2 and cpu.output == [0, 1, 2]
+
+# A fork carries on from where its parent paused, without disturbing it
+echo = Intcode([3, 9, 4, 9, 1105, 1, 0, 99, 0, 0], input=[1])
+assert echo.run() is None and echo.output == [1]
+twin = echo.fork()
+twin.input.append(2)
+assert twin.run() is None and twin.output == [1, 2]
+assert echo.output == [1] and not echo.input
+
+# Forks share decoded instructions, but not ones they have patched differently
+patch = Intcode([3, 4, 1101, 0, 0, 9, 4, 9, 99], input=[])
+assert patch.run() is None
+for value in (5, 7, 5):
+    fork = patch.fork()
+    fork.input.append(value)
+    assert fork.run() == value
+
+# Multiplication by repeated addition: the loop at 4 runs as one step when it can
+MULTIPLY = list(
+    vector("3,100,3,101,1,102,100,102,1001,103,1,103,7,103,101,104,1005,104,4,4,102,99")
+)
+for a, b in ((6, 7), (5, 1), (5, 0), (-3, -2), (7, 40)):
+    slow, quick = Intcode(MULTIPLY, input=[a, b]), Intcode(MULTIPLY, input=[a, b])
+    assert slow.run(fast=False) == quick.run() == a * max(b, 1)
+    assert list(slow.mem) == list(quick.mem)
+assert Intcode(MULTIPLY, input=[3, 10**9]).run() == 3 * 10**9
+assert Intcode(MULTIPLY, input=[3 * 10**9, 10**10]).run() == 3 * 10**19
+
+# Loops that rewrite their own code, from inside (the bound at 10 counts down as the
+# counter counts up) and from outside (the bound at 6 is raised between two runs), and
+# one that counts down from 10 while 5 is less than the counter
+INSIDE = list(vector("1001,20,1,20,1001,10,-1,10,1007,20,10,21,1005,21,0,4,20,99"))
+OUTSIDE = list(
+    vector(
+        "1001,40,1,40,1007,40,7,41,1005,41,0,4,40,1005,42,31,1101,0,12,6,1101,0,1,42,1101,0,0,40,1105,1,0,99"
+    )
+)
+COUNTDOWN = list(vector("1001,20,-1,20,107,5,20,21,1005,21,0,4,20,99,0,0,0,0,0,0,10,0"))
+for tape, output in ((INSIDE, [5]), (OUTSIDE, [7, 12]), (COUNTDOWN, [5])):
+    slow, quick = Intcode(tape, input=[]), Intcode(tape, input=[])
+    slow.run(fast=False), quick.run()
+    assert slow.output == quick.output == output
+    assert list(slow.mem) == list(quick.mem)
+
+# The test loop of SELFMOD runs three times and jumps back twice
+profile = Profile()
+Intcode(SELFMOD, input=[]).run(profile=profile)
+assert profile.address[0] == 3 and profile.opcode[BRK] == 1
+assert profile.taken[10] == 2 and profile.untaken[10] == 1
+assert profile.blocks()[0] == (12, 3, [0, 2, 6, 10])
+
+# Two machines passing a counter back and forth, each adding one, until it hits 10
+PING = list(vector("3,20,1001,20,1,20,4,20,1007,20,10,21,1005,21,0,99,0,0,0,0,0,0"))
+net = Network()
+ping, pong = net.add(Intcode(PING, input=[])), net.add(Intcode(PING, input=[]))
+net.connect(ping, pong)
+net.connect(pong, ping)
+net.run()
+assert net.idle() and not ping.done() and not pong.done()
+net.send(ping, 0)
+net.run()
+assert ping.done() and pong.done() and list(pong.input) == [11]
+
+if __name__ == "__main__":
+    # Profile a day's program: intcode.py DAY [INPUT...], e.g. intcode.py 9 2
+    from inputs import Input
+
+    day, *input = map(int, sys.argv[1:])
+    profile = Profile()
+    Intcode(list(vector(Input(day).read())), input=input).run(profile=profile)
+    print(profile.report())
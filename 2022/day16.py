@@ -1,6 +1,5 @@
-from aoc import bfs, Puzzle
+from aoc import bfs_distances, Puzzle
 
-from itertools import permutations
 import re
 
 
@@ -15,30 +14,27 @@ def volcano(input):
         valves[valve] = (int(rate), set(n.split(", ")))
         rates[valve] = int(rate)
 
-    # Find paths between all valves
-    paths = {}
-    for v1, v2 in permutations(valves.keys(), 2):
-        path = bfs(v1, lambda v: valves[v][1], v2)
-        paths[(v1, v2)] = path[1:]
-        paths[(v1, v1)] = paths[(v2, v2)] = []
+    # Find distances between all valves, one search per valve
+    distance = {v: bfs_distances(v, lambda v: valves[v][1]) for v in valves}
 
     def flow(v1, v2, t):
-        steps = len(paths[(v1, v2)])
+        steps = distance[v1][v2]
         x = rates[v2] * (30 - t - steps - 1)
         return max(x, 0)
 
     closed = set(valves.keys())
     path = []
+    time = 0
     loc = "AA"
     score = 0
     while closed:
-        time = len(path)
         print(f"Minute {time}: {path}")
-        options = [(v, flow(loc, v, time), paths[(loc, v)]) for v in closed]
+        options = [(v, flow(loc, v, time), distance[loc][v]) for v in closed]
         options.sort(key=lambda x: x[1], reverse=True)
         best, s, p = options[0]
         print(time, score, options)
-        path.extend(paths[(loc, best)] + ["Open " + best])
+        path.append("Open " + best)
+        time += distance[loc][best] + 1
         closed.remove(best)
         score += s
         loc = best
@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from aoc import Puzzle
+from aoc import Puzzle, fast_forward
 
 
 def tetris(input, rocks=2022, debug=False):
@@ -11,7 +11,6 @@ def tetris(input, rocks=2022, debug=False):
         ["#", "#", "#", "#"],
         ["##", "##"],
     ]
-    cavern = []
 
     def collides(cavern, shape, x, y):
         return any(
@@ -26,105 +25,85 @@ def tetris(input, rocks=2022, debug=False):
                 yield cav[cy]
                 continue
             dy = cy - y
-            line = list(cavern[cy])
+            line = list(cav[cy])
             for dx in range(len(shape[dy])):
                 if shape[dy][dx] == "#":
                     line[x + dx] = glyph
             yield "".join(line)
 
     def window(cav):
-        peaks = [
-            max([y for y in range(len(cav)) if cav[y][x] == "#"], default=0)
-            for x in range(1, 8)
-        ]
-        bottom = max(
-            [y for y in range(len(cav)) if cav[y][1:8] == "#######"], default=0
-        )
-        # return min(peaks, default=0), max(peaks, default=0)
-        return bottom, max(peaks, default=0)
+        "(highest row no falling rock can reach, highest row with rock in it)"
+        top = max([y for y in range(len(cav)) if "#" in cav[y]], default=0)
+        # Let air flow down from above the highest rock: rows below the lowest air it
+        # reaches are sealed off, so they can never change again
+        frontier = [(top, x) for x in range(1, 8) if cav[top][x] == "."]
+        reached = set(frontier)
+        while frontier:
+            y, x = frontier.pop()
+            for ny, nx in ((y - 1, x), (y, x - 1), (y, x + 1)):
+                if (ny, nx) not in reached and cav[ny][nx] == ".":
+                    reached.add((ny, nx))
+                    frontier.append((ny, nx))
+        lowest = min((y for y, _ in reached), default=top + 1)
+        return lowest - 1, top
 
     def draw(cav, offset=0):
         for y in reversed(range(len(cav))):
             print(f"{y + offset:>4} {cav[y]}")
 
-    gas_index = 0
-    scrolled = 0
-    height = 0
-    cavern = ["+-------+"]
-    seen = {}
-    scores = []
-
-    assert window(cavern) == (0, 0)
-    logged = 1
-
-    for shape_index in range(rocks):
-        shape = shapes[shape_index % len(shapes)]
-        if shape_index == logged * 10:
-            print(
-                f"Shape #{shape_index}: height={height} scrolled={scrolled} seen={len(seen)} scores={len(scores)}"
-            )
-            logged = shape_index
+    def drop(state):
+        "Drop the next rock and let it come to rest."
+        shape_index, gas_index, cavern, height, scrolled = state
+        shape = shapes[shape_index]
         x, y = 3, height + 4
-        add_lines = y + len(shape) - len(cavern)
-        if add_lines:
-            cavern.extend(["|.......|"] * add_lines)
+        cavern = cavern + ("|.......|",) * (y + len(shape) - len(cavern))
         while True:
-            gas = input[gas_index % len(input)]
-            gas_index += 1
+            gas = input[gas_index]
+            gas_index = (gas_index + 1) % len(input)
             dx = -1 if gas == "<" else 1
             # Check for collision with wall or fixed shape
             if not collides(cavern, shape, x + dx, y):
                 x += dx
             if collides(cavern, shape, x, y - 1):
-                cavern = list(paint(cavern, shape, x, y, "#"))
+                cavern = tuple(paint(cavern, shape, x, y, "#"))
                 bottom, top = window(cavern)
                 assert top == max(height, y + len(shape) - 1)
                 height = top
-                # print(f"Shape #{shape_index}: height={height} scrolled={scrolled} bottom={bottom} shape={shape} period={len(input) * len(shapes)}")
-                if bottom > 1:
-                    rep = "\n".join(cavern)
-                    state = (shape_index, bottom, top, scrolled, top + scrolled)
-                    if (prev := seen.get(rep)) is not None:
-                        period = state[0] - prev[0]
-                        cycles = rocks // period
-                        remainder = rocks % period
-                        print(
-                            f"{shape_index}: period={period} cycles={cycles} remainder={remainder} scores={len(scores)}"
-                        )
-                        assert len(scores) > remainder
-                        score = cycles * (state[-1] - prev[-1]) + scores[remainder - 1]
-                        print(
-                            f"Shape #{shape_index}: have seen this state before: {prev} -> {state}: period={period} "
-                            f"cycles={cycles} remainder={remainder} scores[{remainder}]={scores[remainder]} total={score}"
-                        )
-                        for i in range(prev[0]):
-                            print(f"scores[{i}]={scores[i]}")
-                        return score
-                    seen[rep] = state
+                if bottom:
+                    # Everything up to bottom is out of reach: scroll it away
                     scrolled += bottom
                     height -= bottom
-                    cavern = [cavern[0]] + cavern[bottom + 1 :]
+                    cavern = (cavern[0],) + cavern[bottom + 1 :]
                     if debug > 1:
-                        print(
-                            f"> Shape #{shape_index}: height={height} scrolled={scrolled}"
-                        )
+                        print(f"> Shape #{shape_index}: height={height} scrolled={scrolled}")
                         draw(cavern)
-
-                scores.append(height + scrolled)
-                break
+                shape_index = (shape_index + 1) % len(shapes)
+                return shape_index, gas_index, cavern[: height + 1], height, scrolled
             y -= 1
 
+    def rocks_state(state):
+        "Everything but the height, which keeps growing even when the rest repeats."
+        return state[:3]
+
+    state = (0, 0, ("+-------+",), 0, 0)
+    assert window(state[2]) == (0, 0)
+    state, start, period = fast_forward(drop, state, rocks, key=rocks_state)
+    total = state[3] + state[4]
+    if start is not None:
+        # The cavern repeats: every further period adds the same height again
+        gain = sum(fast_forward(drop, state, period)[0][3:]) - total
+        cycles = (rocks - start) // period
+        if debug:
+            print(f"start={start} period={period} cycles={cycles} gain={gain}")
+        total += cycles * gain
     if debug:
-        print(
-            f"Shape #{shape_index}: height={height} scrolled={scrolled} bottom={bottom} shape={shape}"
-        )
-        draw(cavern, scrolled)
-    return height + scrolled
+        draw(state[2], state[4])
+    return total
 
 
 ex18 = ">>><<><>><<<>><>>><<<>>><<<><<<>><>><<>>"
 assert tetris(ex18, 2022) == 3068
-# assert tetris(ex18, 10**12) == 1514285714288
+assert tetris(ex18, 10**12) == 1514285714288
 
 print(tetris(Puzzle(day=17, year=2022).input_data.strip(), 2022))
 print(tetris(Puzzle(day=17, year=2022).input_data.strip(), 10**12))
@@ -1,26 +1,17 @@
 #!/usr/bin/env python3
 
-from aoc import parse_grid, neighbors8, solver
+from aoc import Automaton, Grid, solver
 from aocd import data
 
+# A roll of paper (1) is cleared once fewer than four of its eight neighbors are rolls
+FORKLIFT = Automaton.from_rule(lambda roll, rolls: roll and rolls >= 4, states=2)
+
 
 @solver(part=1)
 @solver(part=2, args=(10**10,))
 def forklift(input: str, rounds: int = 1) -> int:
-    grid = parse_grid(input)
-    result = 0
-    for _ in range(rounds):
-        can_clear = [
-            pos
-            for pos, c in grid.items()
-            if c == "@" and sum(1 for n in neighbors8(pos) if grid.get(n) == "@") < 4
-        ]
-        if not can_clear:
-            break
-        result += len(can_clear)
-        for pos in can_clear:
-            grid[pos] = "."
-    return result
+    rolls = (Grid(input).array() == ord("@")).view("uint8")
+    return int(rolls.sum()) - int(FORKLIFT.run(rolls, rounds).sum())
 
 
 def test_forklift():
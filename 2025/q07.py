@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from aoc import parse_grid, first, solver
+from aoc import Grid, solver
 from aocd import data
 
 from collections import Counter
@@ -8,44 +8,45 @@ from collections import Counter
 
 @solver(part=1)
 def tachyon_beams(input: str):
-    grid = parse_grid(input)
-    maxy = max(y for y, _ in grid.keys())
-    start = first(pos for pos, c in grid.items() if c == "S")
-    assert start is not None
-    frontier = set([start])
+    grid = Grid(input)
+    cells, down = grid.cells, grid.stride
+    bottom = grid.index((grid.height - 1, 0))  # beams stop when they reach the last row
+    splitter = ord("^")
+    frontier = set([grid.index(grid.find("S"))])
     splits = 0
     while frontier:
         new_frontier = set()
-        for by, bx in frontier:
-            by += 1
-            if by == maxy:
+        for i in frontier:
+            i += down
+            if i >= bottom:
                 continue  # end
-            if grid[(by, bx)] == "^":  # split
+            if cells[i] == splitter:  # split
                 splits += 1
-                for pos in ((by, bx - 1), (by, bx + 1)):
-                    if pos in grid:
-                        new_frontier.add(pos)
+                for j in (i - 1, i + 1):
+                    if cells[j]:  # not off the edge
+                        new_frontier.add(j)
                 continue
-            new_frontier.add((by, bx))
+            new_frontier.add(i)
         frontier = new_frontier
     return splits
 
 
 @solver(part=2)
 def tachyon_timelines(input: str):
-    grid = parse_grid(input)
-    maxy = max(y for y, _ in grid.keys())
-    start = first(pos for pos, c in grid.items() if c == "S")
-    assert start is not None
-    beams = Counter([start])
-    while first(beams.elements())[0] < maxy - 1:
+    grid = Grid(input)
+    cells, down = grid.cells, grid.stride
+    splitter = ord("^")
+    start_y, start_x = grid.find("S")
+    beams = Counter([grid.index((start_y, start_x))])
+    for _ in range(start_y, grid.height - 2):
         new_beams = Counter()
-        for (by, bx), count in beams.items():
-            by += 1
-            if grid[(by, bx)] == "^":  # split
-                new_beams.update({(by, bx - 1): count, (by, bx + 1): count})
+        for i, count in beams.items():
+            i += down
+            if cells[i] == splitter:  # split
+                new_beams[i - 1] += count
+                new_beams[i + 1] += count
             else:
-                new_beams.update({(by, bx): count})
+                new_beams[i] += count
         beams = new_beams
     return sum(beams.values())
 
@@ -12,12 +12,14 @@ from dataclasses import dataclass
 from typing import Callable
 import math
 import random
+import numpy as np
 
 from collections import Counter, defaultdict, namedtuple, deque, abc, OrderedDict
 from functools import lru_cache
 from itertools import (
     combinations,
     chain,
+    count as count_from,
     islice,
     takewhile,
     zip_longest,
@@ -71,7 +73,15 @@ def atom(token):
             return token
 
 
-def parse_grid(input: str, transform: Callable = identity) -> dict:
+def parse_grid(input: str, transform: Callable = identity, dense: bool = False):
+    """Parse a block of text into a {(y, x): char} dict, or, with dense=True, into a Grid
+    (which answers the same lookups from one flat buffer, but only holds single characters)."""
+    if dense:
+        if transform is not identity:
+            raise ValueError(
+                "a dense Grid holds raw characters; it cannot apply a transform"
+            )
+        return Grid(input)
     return dict(
         ((y, x), transform(c))
         for y, line in enumerate(input.strip().splitlines())
@@ -287,6 +297,222 @@ def distance(p, q=origin):
     return math.hypot(X(p) - X(q), Y(p) - Y(q))
 
 
+################ Dense grids: one flat buffer instead of a dict of (y, x) tuples
+
+
+class Grid:
+    """A rectangle of single-byte characters, stored row by row in one bytearray that is
+    surrounded by a one-cell border of zero bytes. Inner loops can work on integer indices
+    into `cells`: a neighbor is just i + offset, and the border stops any walk off the edge
+    without a bounds check. Lookups by (y, x) work like the dict from parse_grid."""
+
+    def __init__(self, input: str):
+        lines = [line.lstrip() for line in input.strip().splitlines()]
+        self.height = len(lines)
+        self.width = max(map(len, lines), default=0)
+        self.stride = stride = self.width + 2
+        self.cells = bytearray(stride * (self.height + 2))
+        for y, line in enumerate(lines):
+            i = self.index((y, 0))
+            self.cells[i : i + len(line)] = line.encode()
+        # Index offsets to the neighbors of a cell, in the same order as neighbors4/8
+        self.offsets4 = (-stride, -1, 1, stride)
+        self.offsets8 = (
+            -stride - 1,
+            -stride,
+            -stride + 1,
+            -1,
+            1,
+            stride - 1,
+            stride,
+            stride + 1,
+        )
+
+    def index(self, pos) -> int:
+        "The index into `cells` of the (y, x) position."
+        y, x = pos
+        return (y + 1) * self.stride + x + 1
+
+    def pos(self, i: int) -> tuple:
+        "The (y, x) position of index i into `cells`."
+        y, x = divmod(i, self.stride)
+        return (y - 1, x - 1)
+
+    def inside(self, pos) -> bool:
+        y, x = pos
+        return 0 <= y < self.height and 0 <= x < self.width
+
+    def get(self, pos, default=None):
+        "Like dict.get: the character at (y, x), or default off the grid."
+        if not self.inside(pos):
+            return default
+        c = self.cells[self.index(pos)]
+        return chr(c) if c else default
+
+    def __getitem__(self, pos):
+        c = self.get(pos)
+        if c is None:
+            raise KeyError(pos)
+        return c
+
+    def __setitem__(self, pos, c: str):
+        if not self.inside(pos):
+            raise KeyError(pos)
+        self.cells[self.index(pos)] = ord(c)
+
+    def __contains__(self, pos):
+        return self.get(pos) is not None
+
+    def __len__(self):
+        return len(self.cells) - self.cells.count(0)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def indices(self, char: str | None = None) -> list[int]:
+        "Indices of every cell (holding char, if given)."
+        if char is None:
+            return [i for i, c in enumerate(self.cells) if c]
+        cells, b, i, found = self.cells, ord(char), -1, []
+        while (i := cells.find(b, i + 1)) >= 0:
+            found.append(i)
+        return found
+
+    def keys(self):
+        return [self.pos(i) for i in self.indices()]
+
+    def values(self):
+        return [chr(self.cells[i]) for i in self.indices()]
+
+    def items(self):
+        cells = self.cells
+        return [(self.pos(i), chr(cells[i])) for i in self.indices()]
+
+    def find(self, char: str):
+        "The (y, x) position of the first cell holding char, or None."
+        i = self.cells.find(ord(char))
+        return None if i < 0 else self.pos(i)
+
+    def positions(self, char: str) -> list[tuple]:
+        "The (y, x) positions of every cell holding char, in reading order."
+        return [self.pos(i) for i in self.indices(char)]
+
+    def row(self, y: int) -> str:
+        i = self.index((y, 0))
+        return self.cells[i : i + self.width].decode().rstrip("\0")
+
+    def column(self, x: int) -> str:
+        i = self.index((0, x))
+        return self.cells[i : i + self.height * self.stride : self.stride].decode()
+
+    def array(self):
+        "A writable (height, width) uint8 NumPy view of the cells, without the border."
+        full = np.frombuffer(self.cells, dtype=np.uint8).reshape(
+            self.height + 2, self.stride
+        )
+        return full[1:-1, 1:-1]
+
+    def __str__(self):
+        return "\n".join(self.row(y) for y in range(self.height))
+
+
+################ Long-running simulations
+
+
+def fast_forward(step: Callable, state, n: int | None, key: Callable = identity):
+    """The state after n applications of step, using Brent's cycle detection to skip whole
+    cycles: step runs O(start + length) times, and besides the starting state (kept to restart
+    from once the length is known) only two states, or a state and a key, are held at once.
+    Returns (state, start, length), where the states repeat every `length` steps from step
+    `start` on (both None if n steps pass before any repeat). States are compared by key(state);
+    if the key leaves something out (a position that drifts each cycle, say), the state returned
+    is the equivalent one in the first cycle and the caller must add on the drift.
+    With n=None, run until the states cycle and return the first state of the cycle."""
+    if n == 0:
+        return state, None, None
+    # Find the cycle length: the hare runs ahead, the tortoise teleports to it at powers of two
+    power = length = 1
+    tortoise, hare = key(state), step(state)
+    steps = 1
+    while (hare_key := key(hare)) != tortoise:
+        if steps == n:
+            return hare, None, None
+        if power == length:
+            tortoise = hare_key
+            power *= 2
+            length = 0
+        hare = step(hare)
+        length += 1
+        steps += 1
+    # Find the start of the cycle: walk two states `length` apart until they match
+    tortoise = hare = state
+    for _ in range(length):
+        hare = step(hare)
+    start = 0
+    while key(tortoise) != key(hare):
+        tortoise, hare = step(tortoise), step(hare)
+        start += 1
+    if n is not None:
+        for _ in range((n - start) % length):
+            tortoise = step(tortoise)
+    return tortoise, start, length
+
+
+################ Cellular automata on NumPy grids
+
+
+def neighbor_counts(live, neighborhood: int = 8):
+    "For each cell of a 2-D boolean array, how many of its 4 or 8 neighbors are set (off the edge counts as unset)."
+    h, w = live.shape
+    padded = np.pad(live.astype(np.uint8), 1)
+    offsets = (
+        ((-1, 0), (0, -1), (0, 1), (1, 0))
+        if neighborhood == 4
+        else ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+    )
+    counts = np.zeros((h, w), dtype=np.uint8)
+    for dy, dx in offsets:
+        counts += padded[1 + dy : 1 + dy + h, 1 + dx : 1 + dx + w]
+    return counts
+
+
+@dataclass(frozen=True)
+class Automaton:
+    """A cellular automaton over a 2-D array of small integer cell states. Each generation
+    counts, for every state in `counted`, the neighbors in that state, then looks up the new
+    state of every cell at once in `table[state, count0, count1, ...]`."""
+
+    table: np.ndarray
+    counted: tuple = (1,)
+    neighborhood: int = 8
+
+    @classmethod
+    def from_rule(
+        cls, rule: Callable, states: int, counted: tuple = (1,), neighborhood: int = 8
+    ):
+        "Tabulate rule(state, count0, count1, ...) -> new state for every possible argument."
+        shape = (states,) + (neighborhood + 1,) * len(counted)
+        table = np.zeros(shape, dtype=np.uint8)
+        for args in np.ndindex(*shape):
+            table[args] = rule(*args)
+        return cls(table, tuple(counted), neighborhood)
+
+    def step(self, grid):
+        "The generation after grid."
+        counts = [neighbor_counts(grid == s, self.neighborhood) for s in self.counted]
+        return self.table[(grid, *counts)]
+
+    def run(self, grid, generations: int | None = None):
+        """The grid after `generations` steps, or once it stops changing if generations is None.
+        When a layout repeats, the rest of the run is skipped by going round the cycle."""
+        grid, _, length = fast_forward(
+            self.step, grid, generations, key=np.ndarray.tobytes
+        )
+        if generations is None and length != 1:
+            raise ValueError(f"never settles: it repeats every {length} generations")
+        return grid
+
+
 ################ Debugging
 
 
@@ -315,35 +541,102 @@ def always(value):
     return lambda *args: value
 
 
-def Astar(start, moves_func, h_func, cost_func=always(1), debug=False):
-    "Find a shortest sequence of states from start to a goal state (a state s with h_func(s) == 0)."
-    frontier = [
-        (h_func(start), start)
-    ]  # A priority queue, ordered by path length, f = g + h
-    previous = {start: None}  # start state has no previous state; other states will
+def Astar(start, moves_func, h_func, cost_func=always(1), debug=False, cost_only=False):
+    """Find a shortest sequence of states from start to a goal state (a state s with h_func(s) == 0).
+    With cost_only=True, return the cost of that path instead and don't record how we got there."""
+    # Equal f values are settled by push order, so states themselves are never compared.
+    tiebreak = count_from()
+    h = h_func(start)
+    frontier = [(h, next(tiebreak), h, start)]  # A priority queue, ordered by f = g + h
     path_cost = {start: 0}  # The cost of the best path to a state.
-
-    def Path(s):
-        return [] if (s is None) else Path(previous[s]) + [s]
+    previous = None if cost_only else {start: None}
+    closed = set()  # States already expanded at their current best cost.
 
     while frontier:
-        (f, s) = heappop(frontier)
-        if h_func(s) == 0:
-            return Path(s)
+        (f, _, h, s) = heappop(frontier)
+        if s in closed:
+            continue  # a stale entry, superseded by a cheaper push of the same state
+        if h == 0:
+            return path_cost[s] if cost_only else Path(previous, s)
+        closed.add(s)
+        g0 = path_cost[s]
         for s2 in moves_func(s):
-            g = path_cost[s] + cost_func(s, s2)
+            g = g0 + cost_func(s, s2)
             if s2 not in path_cost or g < path_cost[s2]:
-                heappush(frontier, (g + h_func(s2), s2))
+                closed.discard(s2)  # only an inconsistent h_func can reopen a state
+                h2 = h_func(s2)
+                heappush(frontier, (g + h2, next(tiebreak), h2, s2))
                 path_cost[s2] = g
-                previous[s2] = s
+                if previous is not None:
+                    previous[s2] = s
                 if debug:
                     print(g, s2, len(frontier))
 
 
+def Path(previous, s):
+    "Walk the `previous` links back from s and return the states from the start to s."
+    path = []
+    while s is not None:
+        path.append(s)
+        s = previous[s]
+    path.reverse()
+    return path
+
+
 def bfs(start, moves_func, goals):
-    "Breadth-first search"
+    "Breadth-first search: a shortest path (list of states) from start to a goal state, or None."
     goal_func = goals if callable(goals) else lambda s: s in goals
-    return Astar(start, moves_func, lambda s: 0 if goal_func(s) else 1)
+    if goal_func(start):
+        return [start]
+    previous = {start: None}
+    frontier = deque([start])
+    while frontier:
+        s = frontier.popleft()
+        for s2 in moves_func(s):
+            if s2 not in previous:
+                previous[s2] = s
+                if goal_func(s2):
+                    return Path(previous, s2)
+                frontier.append(s2)
+
+
+def bfs_distances(start, moves_func):
+    "Breadth-first search of everything reachable from start: a dict of {state: distance}."
+    distances = {start: 0}
+    frontier = deque([start])
+    while frontier:
+        s = frontier.popleft()
+        d = distances[s] + 1
+        for s2 in moves_func(s):
+            if s2 not in distances:
+                distances[s2] = d
+                frontier.append(s2)
+    return distances
+
+
+def bfs01(start, moves_func, goals, cost_func):
+    """Shortest path where every move costs 0 or 1 (per cost_func(s, s2)): zero-cost moves go to the
+    front of the deque, unit-cost moves to the back, so no heap is needed."""
+    goal_func = goals if callable(goals) else lambda s: s in goals
+    previous = {start: None}
+    path_cost = {start: 0}
+    frontier = deque([(0, start)])
+    while frontier:
+        (g0, s) = frontier.popleft()
+        if g0 > path_cost[s]:
+            continue  # a stale entry, superseded by a cheaper one
+        if goal_func(s):
+            return Path(previous, s)
+        for s2 in moves_func(s):
+            w = cost_func(s, s2)
+            g = g0 + w
+            if s2 not in path_cost or g < path_cost[s2]:
+                path_cost[s2] = g
+                previous[s2] = s
+                if w:
+                    frontier.append((g, s2))
+                else:
+                    frontier.appendleft((g, s2))
 
 
 ################ Solver registry (used by bench.py for auto-discovery)
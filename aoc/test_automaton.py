@@ -0,0 +1,42 @@
+"""The NumPy cellular automaton engine."""
+
+import numpy as np
+import pytest
+
+import aoc
+
+LIFE = aoc.Automaton.from_rule(lambda alive, n: n == 3 or (alive and n == 2), states=2)
+
+
+def test_neighbor_counts():
+    live = np.array([[1, 0, 0], [0, 1, 0], [0, 0, 1]], dtype=bool)
+    assert aoc.neighbor_counts(live).tolist() == [[1, 2, 1], [2, 2, 2], [1, 2, 1]]
+    assert aoc.neighbor_counts(live, 4).tolist() == [[0, 2, 0], [2, 0, 2], [0, 2, 0]]
+
+
+def test_blinker_cycles_and_fast_forwards():
+    blinker = np.zeros((5, 5), dtype=np.uint8)
+    blinker[2, 1:4] = 1
+    flipped = LIFE.step(blinker)
+    assert flipped[1:4, 2].all() and flipped.sum() == 3
+    assert np.array_equal(LIFE.run(blinker, 10**12), blinker)
+    assert np.array_equal(LIFE.run(blinker, 10**12 + 1), flipped)
+    with pytest.raises(ValueError):
+        LIFE.run(blinker)
+
+
+def test_run_until_stable():
+    block = np.zeros((6, 6), dtype=np.uint8)
+    block[3:5, 3:5] = 1
+    block[0, 0] = 1  # dies of loneliness, leaving a still life
+    settled = LIFE.run(block)
+    assert settled.sum() == 4 and settled[0, 0] == 0
+
+
+def test_multiple_counted_states():
+    # A cell becomes 2 when it has a neighbor in state 1 and one in state 2
+    rule = aoc.Automaton.from_rule(
+        lambda s, ones, twos: 2 if ones and twos else s, states=3, counted=(1, 2)
+    )
+    grid = np.array([[1, 0, 2]], dtype=np.uint8)
+    assert rule.step(grid).tolist() == [[1, 2, 2]]
@@ -0,0 +1,36 @@
+"""Skipping ahead through cycles in long-running simulations."""
+
+import aoc
+
+
+def test_fast_forward_matches_brute_force():
+    def step(x):
+        return (x * x + 1) % 255
+
+    for n in range(60):
+        expected = 3
+        for _ in range(n):
+            expected = step(expected)
+        assert aoc.fast_forward(step, 3, n)[0] == expected
+
+
+def test_fast_forward_reports_cycle():
+    # 0 -> 1 -> 2 -> 3 -> 4 -> 2 -> ...
+    def step(x):
+        return x + 1 if x < 4 else 2
+
+    assert aoc.fast_forward(step, 0, 10**15) == (2 + (10**15 - 2) % 3, 2, 3)
+    assert aoc.fast_forward(step, 0, None) == (2, 2, 3)
+
+
+def test_fast_forward_without_cycle():
+    assert aoc.fast_forward(lambda x: x + 1, 0, 1000) == (1000, None, None)
+    assert aoc.fast_forward(lambda x: x + 1, 0, 0) == (0, None, None)
+
+
+def test_fast_forward_with_key_leaves_drift_to_caller():
+    # A glider moving right: the shape repeats at once, the position drifts by one each step
+    state, start, length = aoc.fast_forward(
+        lambda s: (s[0] + 1, s[1]), (0, "shape"), 10**9, key=lambda s: s[1]
+    )
+    assert (state, start, length) == ((0, "shape"), 0, 1)
@@ -0,0 +1,58 @@
+"""The dense Grid answers the same questions as the dict from parse_grid."""
+
+import pytest
+
+import aoc
+
+EXAMPLE = """#.S
+.#.
+..E"""
+
+
+def test_dense_grid_matches_dict():
+    sparse = aoc.parse_grid(EXAMPLE)
+    grid = aoc.parse_grid(EXAMPLE, dense=True)
+    assert isinstance(grid, aoc.Grid)
+    assert dict(grid.items()) == sparse
+    assert len(grid) == len(sparse)
+    assert grid[(0, 2)] == "S"
+    assert grid.get((3, 0)) is None
+    assert grid.get((-1, 0), "#") == "#"
+    assert (2, 2) in grid and (2, 3) not in grid
+    with pytest.raises(KeyError):
+        grid[(0, 3)]
+
+
+def test_dense_grid_rejects_transform():
+    with pytest.raises(ValueError):
+        aoc.parse_grid(EXAMPLE, transform=int, dense=True)
+
+
+def test_find_and_positions():
+    grid = aoc.Grid(EXAMPLE)
+    assert grid.find("E") == (2, 2)
+    assert grid.find("x") is None
+    assert grid.positions("#") == [(0, 0), (1, 1)]
+    assert grid.row(1) == ".#."
+    assert grid.column(2) == "S.E"
+    assert str(grid) == EXAMPLE
+
+
+def test_offsets_and_border():
+    grid = aoc.Grid(EXAMPLE)
+    i = grid.index((0, 0))
+    assert grid.pos(i) == (0, 0)
+    neighbors = [grid.pos(i + d) for d in grid.offsets4]
+    assert neighbors == [(-1, 0), (0, -1), (0, 1), (1, 0)]
+    # Off-grid neighbors read as the zero border
+    assert [grid.cells[i + d] for d in grid.offsets8].count(0) == 5
+
+
+def test_setitem_and_array_share_cells():
+    grid = aoc.Grid(EXAMPLE)
+    grid[(1, 0)] = "@"
+    a = grid.array()
+    assert a.shape == (3, 3)
+    assert chr(a[1, 0]) == "@"
+    a[2, 0] = ord("#")
+    assert grid[(2, 0)] == "#"
@@ -0,0 +1,111 @@
+"""Shortest-path searches in the shared aoc module."""
+
+from itertools import pairwise
+
+import aoc
+
+
+def grid_moves(width, height, walls=()):
+    def moves(p):
+        return [
+            q
+            for q in aoc.neighbors4(p)
+            if q not in walls and 0 <= q[0] < width and 0 <= q[1] < height
+        ]
+
+    return moves
+
+
+def test_astar_returns_path_from_start_to_goal():
+    path = aoc.Astar(
+        (0, 0), grid_moves(5, 5), lambda p: aoc.cityblock_distance(p, (4, 4))
+    )
+    assert path[0] == (0, 0)
+    assert path[-1] == (4, 4)
+    assert len(path) == 9
+
+
+def test_astar_cost_only():
+    cost = aoc.Astar(
+        (0, 0),
+        grid_moves(5, 5),
+        lambda p: aoc.cityblock_distance(p, (4, 4)),
+        cost_only=True,
+    )
+    assert cost == 8
+
+
+def test_astar_unreachable_goal():
+    assert (
+        aoc.Astar((0, 0), grid_moves(2, 2), lambda p: 0 if p == (9, 9) else 1) is None
+    )
+
+
+def test_astar_never_compares_states():
+    class Opaque:
+        "A state with no ordering, so heap ties must be broken some other way."
+
+        def __init__(self, n):
+            self.n = n
+
+        def __eq__(self, other):
+            return self.n == other.n
+
+        def __hash__(self):
+            return hash(self.n)
+
+    cost = aoc.Astar(
+        Opaque(0),
+        lambda s: [Opaque(s.n + 1), Opaque(s.n + 2)],
+        lambda s: 0 if s.n == 10 else 1,
+        cost_only=True,
+    )
+    assert cost == 5
+
+
+def test_astar_long_corridor_does_not_recurse():
+    n = 100_000
+    path = aoc.Astar(0, lambda s: [s + 1], lambda s: 0 if s == n else 1)
+    assert path == list(range(n + 1))
+
+
+def test_astar_weighted_costs():
+    # Going around the expensive direct edge is cheaper.
+    edges = {"a": {"b": 10, "c": 1}, "c": {"d": 1}, "d": {"b": 1}, "b": {}}
+    path = aoc.Astar(
+        "a",
+        lambda s: edges[s],
+        lambda s: 0 if s == "b" else 1,
+        cost_func=lambda s, s2: edges[s][s2],
+    )
+    assert path == ["a", "c", "d", "b"]
+
+
+def test_bfs_matches_astar_length():
+    walls = {(1, 0), (1, 1), (1, 2), (3, 4), (3, 3), (3, 2)}
+    moves = grid_moves(5, 5, walls)
+    path = aoc.bfs((0, 0), moves, {(4, 4)})
+    assert path[0] == (0, 0) and path[-1] == (4, 4)
+    assert all(aoc.cityblock_distance(p, q) == 1 for p, q in pairwise(path))
+    assert len(path) == len(aoc.Astar((0, 0), moves, lambda p: 0 if p == (4, 4) else 1))
+
+
+def test_bfs_start_is_goal_and_unreachable():
+    assert aoc.bfs("a", lambda s: [], "a") == ["a"]
+    assert aoc.bfs((0, 0), grid_moves(2, 2), {(5, 5)}) is None
+
+
+def test_bfs_distances():
+    distances = aoc.bfs_distances((0, 0), grid_moves(3, 3))
+    assert len(distances) == 9
+    assert distances[(0, 0)] == 0
+    assert distances[(2, 2)] == 4
+
+
+def test_bfs01_prefers_free_moves():
+    # The direct edge costs 1; the longer way round is free.
+    edges = {"a": {"b": 1, "c": 0}, "c": {"d": 0}, "d": {"b": 0}, "b": {}}
+    path = aoc.bfs01(
+        "a", lambda s: edges[s], {"b"}, cost_func=lambda s, s2: edges[s][s2]
+    )
+    assert path == ["a", "c", "d", "b"]
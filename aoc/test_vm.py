@@ -0,0 +1,256 @@
+"""The register-machine assembler and dispatch loop."""
+
+import pytest
+
+from aoc.vm import (
+    ISA,
+    Machine,
+    assemble,
+    match,
+    schedule,
+    smallest,
+    transpile,
+)
+
+
+def jump(m, r, ip, a, b, c):
+    if r[a]:
+        return ip + r[b]
+
+
+BUNNY = ISA(
+    "abcd",
+    {
+        "cpy": ("vv", "if b >= 0:\n    r[b] = r[a]"),
+        "inc": ("r", "r[a] += 1"),
+        "dec": ("r", "r[a] -= 1"),
+        "jnz": ("vv", jump),
+        "out": ("v", "m.output.append(r[a])"),
+        "inp": ("r", "if not m.input:\n    raise Blocked\nr[a] = m.input.popleft()"),
+        "hlt": ("", "raise Halt"),
+    },
+)
+
+
+def test_assemble():
+    program = assemble(BUNNY, "cpy 41 a\n\ninc a\njnz a -2\njnz 1 -2\nhlt\n")
+    cpy, inc, jnz, hlt = (BUNNY.opcodes[name] for name in ("cpy", "inc", "jnz", "hlt"))
+    # Constants get registers at negative indices, one per distinct value
+    assert program.constants == [41, -2, 1]
+    assert program.code == [
+        (cpy, -1, 0, 0),
+        (inc, 0, 0, 0),
+        (jnz, 0, -2, 0),
+        (jnz, -3, -2, 0),
+        (hlt, 0, 0, 0),
+    ]
+    assert program.source[2] == "jnz a -2"
+    assert program.ip is None
+
+
+def test_assemble_errors():
+    with pytest.raises(ValueError):
+        assemble(BUNNY, "mul a b")
+    with pytest.raises(ValueError):
+        assemble(BUNNY, "inc 3")
+    with pytest.raises(ValueError):
+        assemble(BUNNY, "inc a b")
+
+
+def test_run():
+    program = assemble(BUNNY, "cpy 41 a\ninc a\ninc a\ndec a\njnz a 2\ndec a")
+    machine = Machine(program)
+    assert machine.run()
+    assert machine.registers() == {"a": 42, "b": 0, "c": 0, "d": 0}
+    assert machine["a"] == 42 and machine.steps == 5
+    # Writing to a constant does nothing
+    machine = Machine(assemble(BUNNY, "cpy 1 2\nout 2"))
+    machine.run()
+    assert machine.output == [2]
+
+
+def test_limit_and_trace():
+    program = assemble(BUNNY, "inc a\njnz 1 -1")
+    machine = Machine(program, registers={"a": 10})
+    assert not machine.run(limit=7)
+    assert machine["a"] == 14 and machine.steps == 7 and machine.ip == 1
+    seen = []
+    assert not machine.run(limit=3, trace=lambda m, ip: seen.append((ip, m["a"])))
+    assert seen == [(1, 14), (0, 14), (1, 15)]
+    assert machine.steps == 10
+
+
+def test_blocked_and_halt():
+    program = assemble(BUNNY, "inp a\nout a\njnz a -2\nhlt\ninc b")
+    machine = Machine(program, registers=[0, 5], input=[3, 4])
+    assert not machine.run()
+    assert machine.output == [3, 4] and machine.ip == 0
+    machine.input.append(0)
+    assert machine.run()
+    assert machine.output == [3, 4, 0] and machine.regs[:2] == [0, 5]
+    assert machine.steps == 10 and machine.run()
+
+
+def test_patch():
+    program = assemble(BUNNY, "inc a\ninc a")
+    machine = Machine(program)
+    machine.patch(1, "dec")
+    assert machine.mnemonic(1) == "dec"
+    machine.run()
+    assert machine["a"] == 0
+    # Other machines running the same program are unaffected
+    assert Machine(program).run() and program.code[1][0] == BUNNY.opcodes["inc"]
+
+
+def test_bound_ip():
+    # The Elf code example of 2018 day 19: register 0 is the instruction pointer
+    elf = ISA(
+        "012345",
+        {
+            "seti": ("iir", "r[c] = a"),
+            "addi": ("rir", "r[c] = r[a] + b"),
+            "addr": ("rrr", "r[c] = r[a] + r[b]"),
+            "setr": ("rir", "r[c] = r[a]"),
+        },
+    )
+    text = "#ip 0\nseti 5 0 1\nseti 6 0 2\naddi 0 1 0\naddr 1 2 3\nsetr 1 0 0\nseti 8 0 4\nseti 9 0 5"
+    program = assemble(elf, text)
+    assert program.ip == 0
+    machine = Machine(program)
+    assert machine.run()
+    assert machine.regs == [6, 5, 6, 0, 0, 9] and machine.steps == 5
+    traced = Machine(program)
+    traced.run(trace=lambda m, ip: None)
+    assert traced.regs == machine.regs and traced.steps == 5
+
+
+def test_extend():
+    loud = BUNNY.extend({"out": ("v", "m.output.append(2 * r[a])")})
+    assert loud.opcodes == BUNNY.opcodes
+    machine = Machine(assemble(loud, "out 21"))
+    machine.run()
+    assert machine.output == [42]
+
+
+def test_compiled_matches_interpreter():
+    # Multiply 6 by 7 by repeated increments, then output and read input
+    text = (
+        "cpy 6 b\ncpy 7 c\ninc a\ndec c\njnz c -2\ndec b\njnz b -5\nout a\ninp d\nout d"
+    )
+    program = assemble(BUNNY, text)
+    for limit in (1, 5, 17, 100, None):
+        slow, fast = Machine(program, input=[9]), Machine(program, input=[9])
+        assert slow.run(limit=limit) == fast.run(limit=limit, compiled=True)
+        assert (slow.regs, slow.ip, slow.steps) == (fast.regs, fast.ip, fast.steps)
+        assert slow.output == fast.output
+    assert fast.output == [42, 9] and fast.steps == 148
+    # Blocked on input in the middle of a compiled run
+    blocked = Machine(program)
+    assert not blocked.run(compiled=True)
+    assert blocked.ip == 8 and blocked.output == [42]
+
+
+def test_compiled_breakpoints():
+    program = assemble(BUNNY, "inc a\ninc b\njnz 1 -2")
+    for compiled in (False, True):
+        machine = Machine(program)
+        seen = []
+        for _ in range(3):
+            assert not machine.run(compiled=compiled, breakpoints={1})
+            seen.append((machine.ip, machine["a"], machine["b"]))
+        assert seen == [(1, 1, 0), (1, 2, 1), (1, 3, 2)]
+
+
+def test_compiled_bound_ip():
+    elf = ISA(
+        "0123",
+        {
+            "seti": ("iir", "r[c] = a"),
+            "addi": ("rir", "r[c] = r[a] + b"),
+            "addr": ("rrr", "r[c] = r[a] + r[b]"),
+            "gtri": ("rir", "r[c] = 1 if r[a] > b else 0"),
+        },
+    )
+    # Count register 1 up to 1000, skipping back with a conditional jump
+    text = "#ip 3\naddi 1 1 1\ngtri 1 999 2\naddr 2 3 3\nseti -1 0 3\naddi 0 7 0"
+    program = assemble(elf, text)
+    assert "addi" not in transpile(program) and "r1 = r1 + 1" in transpile(program)
+    slow, fast = Machine(program), Machine(program)
+    slow.run()
+    fast.run(compiled=True)
+    assert slow.regs == fast.regs == [7, 1000, 1, 4] and slow.steps == fast.steps
+
+
+TOGGLED = {"inc": "dec", "dec": "inc", "tgl": "inc", "jnz": "cpy", "cpy": "jnz"}
+
+
+def toggle(m, r, ip, a, b, c):
+    target = ip + r[a]
+    if 0 <= target < len(m.code):
+        m.patch(target, TOGGLED[m.mnemonic(target)])
+
+
+def test_compiled_patched():
+    # 2016 day 23: a! + 73 * 79, with the last loop toggled into shape as it runs
+    toggling = BUNNY.extend({"tgl": ("v", toggle)})
+    text = """cpy a b\ndec b\ncpy a d\ncpy 0 a\ncpy b c\ninc a\ndec c\njnz c -2\ndec d
+    jnz d -5\ndec b\ncpy b c\ncpy c d\ndec d\ninc c\njnz d -2\ntgl c\ncpy -16 c
+    jnz 1 c\ncpy 73 c\njnz 79 d\ninc a\ninc d\njnz d -2\ninc c\njnz c -5"""
+    program = assemble(toggling, text)
+    slow, fast = Machine(program, {"a": 7}), Machine(program, {"a": 7})
+    slow.run()
+    # Stop now and then so that some blocks are compiled after they are patched
+    while not fast.run(limit=997, compiled=True):
+        pass
+    assert fast["a"] == 5040 + 73 * 79
+    assert (slow.regs, slow.ip, slow.steps) == (fast.regs, fast.ip, fast.steps)
+    assert fast.listing == slow.listing != program.code
+
+
+def test_match():
+    program = assemble(
+        BUNNY, "cpy 1 d\ncpy b c\ninc a\ndec c\njnz c -2\ndec d\njnz d -5"
+    )
+    add = "inc x\ndec y\njnz y -2"
+    assert match(add, program, 2) == {"x": 0, "y": 2}
+    assert match(add, program, 1) is None
+    assert match("cpy 1 n\ncpy _ y\n" + add, program, 0) == {"n": 3, "x": 0, "y": 2}
+    # A name is a register, and different names different registers
+    assert match("cpy one d", program, 0) is None
+    assert match("cpy b c\ninc b", program, 1) is None
+    # Elf code binds the ip to a register, and jumps to absolute addresses
+    elf = ISA(
+        "0123", {"seti": ("iir", "r[c] = a"), "addr": ("rrr", "r[c] = r[a] + r[b]")}
+    )
+    program = assemble(elf, "#ip 3\naddr 3 1 3\nseti 0 0 3")
+    loop = "addr t IP IP\nseti +0 _ IP"
+    assert match(loop, program, 0) is None
+    assert match(loop, program, 0, {"addr"}) == {"IP": 3, "t": 1}
+
+
+def test_schedule():
+    # Pass a token back and forth, counting it down, until it gets to 0
+    program = assemble(BUNNY, "inp a\njnz a 2\nhlt\ndec a\nout a\njnz 1 -5")
+    ping, pong = Machine(program), Machine(program, input=[9])
+    ping.output, pong.output = pong.input, ping.input
+    assert schedule([ping, pong], limit=2) == [4, 5]
+    assert ping.done and not pong.done and not pong.input
+    # Nobody ever sends anything: both wait for ever
+    lonely = [Machine(program), Machine(program)]
+    assert schedule(lonely) == [0, 0] and lonely[0].steps == lonely[1].steps == 0
+
+
+COUNTDOWN = assemble(BUNNY, "dec a\njnz a -1\nout 1")
+
+
+def halts_within_50(a):
+    return Machine(COUNTDOWN, {"a": a}).run(limit=50)
+
+
+def test_smallest():
+    # Counting a down from 0 or less never gets to 0: the first a that halts is 1
+    for workers in (1, 2):
+        found, rate = smallest(halts_within_50, start=-100, workers=workers, chunk=7)
+        assert found == 1 and rate > 0
+    assert smallest(halts_within_50, start=-5, stop=0, workers=1)[0] is None
+    assert smallest(halts_within_50, start=-5, stop=0, workers=2)[0] is None
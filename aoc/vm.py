@@ -0,0 +1,594 @@
+"""Register machines: one assembler and dispatch loop for the puzzles' toy assembly
+languages (Assembunny, Duet, Elf code, ...).
+
+A language is an ISA: its register names and, for each mnemonic, the kinds of
+its operands and what it does.  assemble() turns source text into integer
+opcodes and register indices, once, and a Machine runs the result."""
+
+import ast
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+
+class Blocked(Exception):
+    "Raised by an instruction that has to wait for input; it runs again on resume."
+
+
+class Halt(Exception):
+    "Raised by an instruction that stops the program."
+
+
+def _compile(name, source):
+    "The instruction function for a snippet of Python source."
+    lines = [f"def {name}(m, r, ip, a, b, c):"]
+    lines += ["    " + line for line in source.splitlines()]
+    namespace = {"Blocked": Blocked, "Halt": Halt}
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+
+class ISA:
+    """An instruction set.  ops maps each mnemonic to (kinds, code): kinds has a
+    letter per operand, 'r' for a register, 'i' for an integer and 'v' for either
+    (a constant is given a register of its own); code is a function
+    code(m, r, ip, a, b, c) of the machine, its registers and the instruction's
+    address and operands, or the Python source of its body.  It returns the next
+    ip, or None to carry on with the instruction after it.  Opcodes number the
+    mnemonics in order."""
+
+    def __init__(self, registers, ops):
+        self.registers = registers
+        self.ops = dict(ops)
+        self.names = list(self.ops)
+        self.opcodes = {name: i for i, name in enumerate(self.names)}
+        self.kinds = [kinds for kinds, _ in self.ops.values()]
+        self.sources = [
+            None if callable(code) else code for kinds, code in self.ops.values()
+        ]
+        self.funcs = [
+            code if callable(code) else _compile("op_" + name, code)
+            for name, (kinds, code) in self.ops.items()
+        ]
+
+    def __getitem__(self, name):
+        "The function that executes mnemonic name."
+        return self.funcs[self.opcodes[name]]
+
+    def extend(self, ops):
+        "A copy of this ISA with ops added or replaced; existing opcodes are kept."
+        return ISA(self.registers, {**self.ops, **ops})
+
+    def index(self, register):
+        "The register index of a register name."
+        return self.registers.index(register)
+
+
+@dataclass
+class Program:
+    "Assembled code, ready to load into any number of Machines."
+
+    isa: ISA
+    code: list  # (opcode, a, b, c) per instruction
+    constants: list  # values of 'v' operands that aren't registers
+    ip: int = None  # the register bound to the instruction pointer, if any
+    source: list = ()  # the line each instruction was assembled from
+
+
+def assemble(isa, text):
+    """Assemble text (a str, or an iterable of lines) for isa.  Constants used where
+    a register could be get read-only registers of their own, at negative indices,
+    so every 'v' operand is a register index and an instruction can tell whether it
+    was given a register by its sign.  An '#ip n' line binds the instruction pointer
+    to register n, as in the Elf code of 2018."""
+    if isinstance(text, str):
+        text = text.splitlines()
+    code, constants, source, ip = [], {}, [], None
+
+    def operand(kind, token):
+        if kind == "i":
+            return int(token)
+        if token in isa.registers:
+            return isa.index(token)
+        if kind == "r":
+            raise ValueError(f"Not a register: {token}")
+        return -1 - constants.setdefault(int(token), len(constants))
+
+    for line in text:
+        tokens = line.split()
+        if not tokens:
+            continue
+        name, *args = tokens
+        if name == "#ip":
+            ip = isa.index(args[0])
+            continue
+        if name not in isa.opcodes:
+            raise ValueError(f"Unknown instruction: {line}")
+        opcode = isa.opcodes[name]
+        kinds = isa.kinds[opcode]
+        if len(args) != len(kinds):
+            raise ValueError(f"Wrong number of operands: {line}")
+        operands = [operand(kind, token) for kind, token in zip(kinds, args)]
+        code.append((opcode, *operands, *[0] * (3 - len(operands))))
+        source.append(line.strip())
+    return Program(isa, code, list(constants), ip, source)
+
+
+class Machine:
+    """A Program loaded into registers.  Set registers by name with registers (a dict,
+    or a list of values in order); input is a queue for instructions that read, and
+    output a list for those that write."""
+
+    def __init__(self, program, registers=(), input=()):
+        self.program = program
+        self.isa = isa = program.isa
+        # Named registers, then the constants in reverse, so constant k is at -1 - k
+        self.regs = [0] * len(isa.registers) + program.constants[::-1]
+        if isinstance(registers, dict):
+            for name, value in registers.items():
+                self[name] = value
+        else:
+            self.regs[: len(registers)] = registers
+        self.listing = list(program.code)  # as modified by patch()
+        self.code = [(isa.funcs[op], a, b, c) for op, a, b, c in self.listing]
+        self.ip = 0
+        self.steps = 0  # instructions executed, over all runs
+        self.input = deque(input)
+        self.output = []
+        self.done = False
+        self._blocks = {}  # compiled blocks, their spans and patched blocks, by breakpoints
+        self._patched = set()  # addresses patch() has changed
+
+    def __getitem__(self, register):
+        return self.regs[self.isa.index(register)]
+
+    def __setitem__(self, register, value):
+        self.regs[self.isa.index(register)] = value
+
+    def registers(self):
+        "The named registers, as a dict."
+        return dict(zip(self.isa.registers, self.regs))
+
+    def mnemonic(self, ip):
+        return self.isa.names[self.listing[ip][0]]
+
+    def patch(self, ip, name):
+        "Change the instruction at ip to mnemonic name, keeping its operands."
+        opcode = self.isa.opcodes[name]
+        self.listing[ip] = (opcode, *self.listing[ip][1:])
+        self.code[ip] = (self.isa.funcs[opcode], *self.listing[ip][1:])
+        self._patched.add(ip)
+        for _, spans, _, dirty in self._blocks.values():
+            if ip in spans:
+                start, stop = spans[ip]
+                dirty[start] = (stop, None)  # recompiled when next run
+
+    def run(self, limit=None, trace=None, compiled=False, breakpoints=()):
+        """Run until the program halts (returning True: the ip has left the program, or
+        an instruction raised Halt), or until an instruction raises Blocked, `limit`
+        more instructions have run, or the ip gets to one of the breakpoints (other
+        than the one it starts at), returning False: call run again to carry on.
+        trace(machine, ip) is called before each instruction.  compiled=True runs
+        the program's basic blocks as transpiled Python (see transpile) instead of
+        dispatching on each instruction."""
+        if self.done:
+            return True
+        if trace is not None or (breakpoints and not compiled):
+            return self._trace(limit, trace, breakpoints)
+        if compiled:
+            return self._compiled(limit, frozenset(breakpoints))
+        code, regs, ipreg = self.code, self.regs, self.program.ip
+        n = len(code)
+        ip, steps = self.ip, 0
+        try:
+            if ipreg is None:
+                while 0 <= ip < n and steps != limit:
+                    func, a, b, c = code[ip]
+                    nxt = func(self, regs, ip, a, b, c)
+                    ip = ip + 1 if nxt is None else nxt
+                    steps += 1
+            else:
+                while 0 <= ip < n and steps != limit:
+                    func, a, b, c = code[ip]
+                    regs[ipreg] = ip
+                    func(self, regs, ip, a, b, c)
+                    ip = regs[ipreg] + 1
+                    steps += 1
+        except Blocked:
+            pass
+        except Halt:
+            steps += 1
+            self.done = True
+        finally:
+            self.ip = ip
+            self.steps += steps
+        self.done = self.done or not 0 <= ip < n
+        return self.done
+
+    def _trace(self, limit, trace, breakpoints=()):
+        "run(), calling trace before each instruction and keeping ip and steps current."
+        code, regs, ipreg = self.code, self.regs, self.program.ip
+        end = None if limit is None else self.steps + limit
+        start = self.steps
+        try:
+            while 0 <= self.ip < len(code) and self.steps != end:
+                if self.ip in breakpoints and self.steps != start:
+                    return False
+                if trace is not None:
+                    trace(self, self.ip)
+                func, a, b, c = code[self.ip]
+                if ipreg is not None:
+                    regs[ipreg] = self.ip
+                nxt = func(self, regs, self.ip, a, b, c)
+                if ipreg is not None:
+                    nxt = regs[ipreg] + 1
+                self.ip = self.ip + 1 if nxt is None else nxt
+                self.steps += 1
+        except Blocked:
+            pass
+        except Halt:
+            self.steps += 1
+            self.done = True
+        self.done = self.done or not 0 <= self.ip < len(code)
+        return self.done
+
+    def _compiled(self, limit, breakpoints):
+        """run() with compiled blocks, interpreting one instruction at a time wherever
+        the blocks can't go: instructions that aren't plain Python snippets, jumps to
+        the middle of a block, and breakpoints.  The blocks are compiled from the
+        program as assembled; a block that patch() has changed since is compiled
+        again on its own, as it now reads."""
+        end = math.inf if limit is None else self.steps + limit
+        start, n = self.steps, len(self.code)
+        if breakpoints not in self._blocks:
+            blocks, spans = compiled(self.program, breakpoints=breakpoints)
+            dirty = {
+                spans[ip][0]: (spans[ip][1], None)
+                for ip in self._patched
+                if ip in spans
+            }
+            starts = {start for start, _ in spans.values()}
+            self._blocks[breakpoints] = (blocks, spans, starts, dirty)
+        blocks, spans, starts, dirty = self._blocks[breakpoints]
+        while 0 <= self.ip < n and self.steps < end:
+            steps = self.steps
+            if self.ip in dirty:
+                stop, region = dirty[self.ip]
+                if region is None:
+                    region = compiled(
+                        self.program, self.listing, breakpoints, (self.ip, stop)
+                    )[0]
+                    dirty[self.ip] = (stop, region)
+                self.ip, self.steps = region(self, self.regs, self.ip, self.steps, end)
+            elif self.ip in starts:
+                self.ip, self.steps = blocks(
+                    self, self.regs, self.ip, self.steps, end, dirty
+                )
+            if self.steps != steps:
+                continue
+            if not (0 <= self.ip < n and self.steps < end):
+                break
+            if self.ip in breakpoints and self.steps != start:
+                return False
+            steps = self.steps
+            if self.run(limit=1) or self.steps == steps:
+                return self.done  # halted, or blocked
+        self.done = not 0 <= self.ip < n
+        return self.done
+
+
+################ Transpiling: basic blocks of straight-line Python
+
+
+class _Inline(ast.NodeTransformer):
+    """Specialise an instruction's source to the instruction at ip: its operands and
+    ip become constants, registers become local variables r0, r1, ..., constant
+    registers become their values and writes to them are dropped.  With the ip
+    bound to a register, reading that register gives ip.  A return becomes a jump
+    out of the block, counting the k instructions run so far."""
+
+    def __init__(self, ip, operands, constants, ipreg, k):
+        self.names = dict(zip("abc", operands), ip=ip)
+        self.constants, self.ipreg, self.k = constants, ipreg, k
+        self.ip = ip
+        self.opaque = False  # uses the machine, or something else we can't inline
+        self.jumps = False
+        self.targets = set()  # where it jumps to, when that doesn't depend on registers
+        self.dynamic = False  # where it jumps to does depend on registers
+        self.registers = set()  # the ones it reads or writes
+
+    def visit_Name(self, node):
+        if node.id in self.names and isinstance(node.ctx, ast.Load):
+            return ast.Constant(self.names[node.id])
+        if node.id in ("m", "r"):
+            self.opaque = True
+        return node
+
+    def visit_Raise(self, node):
+        self.opaque = True
+        return node
+
+    def visit_Subscript(self, node):
+        node.slice = self.visit(node.slice)
+        if not (
+            isinstance(node.value, ast.Name)
+            and node.value.id == "r"
+            and isinstance(node.slice, ast.Constant)
+        ):
+            return self.generic_visit(node)
+        k = node.slice.value
+        if isinstance(node.ctx, ast.Store):
+            if k == self.ipreg:
+                self.jumps = True
+            if k >= 0:
+                self.registers.add(k)
+            return ast.Name("_" if k < 0 else f"r{k}", ast.Store())
+        if k < 0:
+            return ast.Constant(self.constants[-1 - k])
+        if k == self.ipreg:
+            return ast.Constant(self.ip)
+        self.registers.add(k)
+        return ast.Name(f"r{k}", ast.Load())
+
+    def visit_Assign(self, node):
+        node = self.generic_visit(node)
+        if self.ipreg is not None and any(
+            isinstance(t, ast.Name) and t.id == f"r{self.ipreg}" for t in node.targets
+        ):
+            self.target(node.value, 1)
+        return node
+
+    def visit_Return(self, node):
+        self.jumps = True
+        value = (
+            ast.Constant(self.ip + 1) if node.value is None else self.visit(node.value)
+        )
+        self.target(value, 0)
+        return [
+            ast.Assign([ast.Name("ip", ast.Store())], value),
+            ast.AugAssign(
+                ast.Name("steps", ast.Store()), ast.Add(), ast.Constant(self.k)
+            ),
+            ast.Continue(),
+        ]
+
+    def target(self, value, offset):
+        "Note where a jump to value + offset goes, if we can tell."
+        if any(isinstance(node, ast.Name) for node in ast.walk(value)):
+            self.dynamic = True
+        else:
+            expression = ast.fix_missing_locations(ast.Expression(value))
+            self.targets.add(eval(compile(expression, "<jump>", "eval")) + offset)
+
+
+def _inline(program, listing, ip, k):
+    "The _Inline'd statements for instruction ip, and what it found out."
+    op, *operands = listing[ip]
+    source = program.isa.sources[op]
+    inliner = _Inline(ip, operands, program.constants, program.ip, k)
+    if source is None:
+        inliner.opaque = True
+        return [], inliner
+    return inliner.visit(ast.parse(source)).body, inliner
+
+
+def _partition(program, listing, breakpoints, lo, hi):
+    "The basic blocks of listing[lo:hi], as lists of addresses."
+    info = {ip: _inline(program, listing, ip, 1)[1] for ip in range(lo, hi)}
+    leaders = {lo, *breakpoints}
+    for ip, inliner in info.items():
+        if inliner.opaque or inliner.jumps:
+            leaders.add(ip + 1)
+        leaders.update(inliner.targets)
+        if inliner.dynamic:
+            leaders.update((ip + 1, ip + 2))  # such as a conditional skip
+    blocks, ip = [], lo
+    while ip < hi:
+        if info[ip].opaque or ip in breakpoints:
+            ip += 1
+            continue
+        block = [ip]
+        while not info[ip].jumps and ip + 1 < hi and ip + 1 not in leaders:
+            if info[ip + 1].opaque:
+                break
+            ip += 1
+            block.append(ip)
+        blocks.append(block)
+        ip += 1
+    return blocks
+
+
+def transpile(program, listing=None, breakpoints=(), region=None):
+    """Python source for blocks(m, r, ip, steps, end, dirty=()) -> (ip, steps), which
+    runs the program (or listing, a patched copy of its code) a basic block at a
+    time from ip, until it gets to an instruction that isn't the start of a
+    compiled block (that isn't a Python snippet, or is a breakpoint, or is only
+    reached by jumping into the middle of a block), to the start of a block in
+    dirty, or the next block would take steps past end.  The registers the blocks
+    use live in local variables while it runs.  region=(lo, hi) compiles only
+    listing[lo:hi]."""
+    listing = program.code if listing is None else listing
+    ipreg = program.ip
+    blocks = _partition(program, listing, breakpoints, *(region or (0, len(listing))))
+    used = set() if ipreg is None or not blocks else {ipreg}
+    lines = []
+    for i, block in enumerate(blocks):
+        lines.append(
+            f"            {'el' if i else ''}if ip == {block[0]} and {block[0]} not in dirty:"
+        )
+        body = [f"if steps + {len(block)} > end:", "    break"]
+        for k, ip in enumerate(block, 1):
+            statements, inliner = _inline(program, listing, ip, k)
+            used |= inliner.registers
+            if ipreg is not None and inliner.jumps:
+                body.append(f"r{ipreg} = {ip}")
+            body += ast.unparse(
+                ast.fix_missing_locations(ast.Module(statements, []))
+            ).splitlines()
+            if ipreg is not None and inliner.jumps:
+                body += [f"ip = r{ipreg} + 1", f"steps += {k}", "continue"]
+        if ipreg is None or not inliner.jumps:  # else the block ends with a jump
+            last = block[-1]
+            if ipreg is not None:
+                body.append(f"r{ipreg} = {last}")
+            body += [f"ip = {last + 1}", f"steps += {len(block)}"]
+        lines += ["                " + line for line in body]
+    lines.append("            else:" if blocks else "            if True:")
+    used = sorted(used)
+    local = ", ".join(f"r{k}" for k in used)
+    stored = ", ".join(f"r[{k}]" for k in used)
+    lines = [
+        "def blocks(m, r, ip, steps, end, dirty=()):",
+        f"    {local}, = {stored}," if used else "",
+        "    _ = 0",
+        "    try:",
+        "        while True:",
+        *lines,
+        "                break",
+        "    finally:",
+        f"        {stored}, = {local}," if used else "        pass",
+        "    return ip, steps",
+    ]
+    return "\n".join(lines)
+
+
+_COMPILED = {}
+
+
+def compiled(program, listing=None, breakpoints=(), region=None):
+    """The blocks function of transpile(program, listing, breakpoints, region),
+    compiled once for each distinct region of code, and a dict mapping each
+    address in one of its blocks to the (start, stop) of that block."""
+    listing = program.code if listing is None else listing
+    lo, hi = region or (0, len(listing))
+    key = (id(program), lo, tuple(listing[lo:hi]), frozenset(breakpoints))
+    if key not in _COMPILED:
+        namespace = {}
+        exec(transpile(program, listing, breakpoints, region), namespace)
+        spans = {}
+        for block in _partition(program, listing, breakpoints, lo, hi):
+            spans.update((ip, (block[0], block[-1] + 1)) for ip in block)
+        # program kept so its id stays unique
+        _COMPILED[key] = (program, namespace["blocks"], spans)
+    return _COMPILED[key][1:]
+
+
+################ Matching: finding known loops in a program
+
+
+def match(template, program, start, commutative=()):
+    """Match template against the program's code at start, returning a dict of the
+    registers bound to its names, or None.  template is a list of instructions,
+    each a list of tokens (or text, an instruction a line): an operand token is
+    _ for anything, an integer for itself (an immediate or a constant), +k for
+    the address start + k, or else a name for a register, with IP standing for
+    the one bound to the ip.  Different names must be different registers.  The
+    first two operands of mnemonics in commutative may come either way round."""
+    if isinstance(template, str):
+        template = [line.split() for line in template.strip().splitlines()]
+    if start + len(template) > len(program.code):
+        return None
+    isa = program.isa
+    binding = {} if program.ip is None else {"IP": program.ip}
+
+    def unify(binding, symbol, kind, value):
+        if symbol == "_":
+            return True
+        if kind != "i" and value >= 0:
+            return symbol.isidentifier() and binding.setdefault(symbol, value) == value
+        if kind != "i":
+            value = program.constants[-1 - value]
+        if symbol.startswith("+"):
+            return value == start + int(symbol)
+        return not symbol.isidentifier() and value == int(symbol)
+
+    for (name, *args), (op, *operands) in zip(template, program.code[start:]):
+        if isa.names[op] != name:
+            return None
+        kinds = isa.kinds[op]
+        orders = [args]
+        if name in commutative:
+            orders.append([args[1], args[0], *args[2:]])
+        for order in orders:
+            trial = dict(binding)
+            if all(map(partial(unify, trial), order, kinds, operands)):
+                binding = trial
+                break
+        else:
+            return None
+    if len(set(binding.values())) != len(binding):
+        return None
+    return binding
+
+
+################ Scheduling: machines that talk to each other
+
+
+def schedule(machines, limit=10**4, compiled=False):
+    """Run machines in turn, each until it blocks on input, halts, or has run limit
+    more instructions, until none of them can get any further: all done, or
+    waiting for input that nothing is left to send (deadlock).  Connect them
+    first by making one's output another's input, as in a.output = b.input.
+    Returns how many values each of them sent."""
+    sent = [0] * len(machines)
+    idle = 0  # machines in a row that couldn't run; when all of them, we're stuck
+    while idle < len(machines):
+        for k, machine in enumerate(machines):
+            steps, before = machine.steps, len(machine.output)
+            machine.run(limit=limit, compiled=compiled)
+            sent[k] += len(machine.output) - before
+            idle = idle + 1 if machine.steps == steps else 0
+            if idle == len(machines):
+                break
+    return sent
+
+
+################ Searching: the smallest input that makes a program behave
+
+
+def _first(accepts, lo, hi):
+    return next((n for n in range(lo, hi) if accepts(n)), None)
+
+
+def smallest(accepts, start=0, stop=None, chunk=64, workers=None):
+    """The smallest n in range(start, stop) (or counting up for ever) for which
+    accepts(n) is true, or None, and how many candidates a second were tried.
+    Chunks of candidates go to a pool of `workers` processes (default: one per
+    CPU; workers=1 tries them here instead), in order, so accepts should give up
+    on a candidate as soon as it can tell; once a chunk has an answer and all the
+    chunks before it have none, the chunks after it are cancelled.  accepts is
+    sent to the workers by name, so it must be a module-level function, and
+    anything it runs (a Program, say) should be module-level too."""
+    began = time.perf_counter()
+    stop = math.inf if stop is None else stop
+
+    def result(found):
+        tried = (stop if found is None else found + 1) - start
+        return found, tried / max(time.perf_counter() - began, 1e-9)
+
+    if workers == 1:
+        lo = start
+        while lo < stop:
+            found = _first(accepts, lo, min(lo + chunk, stop))
+            if found is not None:
+                return result(found)
+            lo += chunk
+        return result(None)
+    workers = workers or os.cpu_count() or 1
+    pool, pending, lo = ProcessPoolExecutor(workers), deque(), start
+    try:
+        while True:
+            while len(pending) < 2 * workers and lo < stop:
+                pending.append(pool.submit(_first, accepts, lo, min(lo + chunk, stop)))
+                lo += chunk
+            if not pending:
+                return result(None)
+            found = pending.popleft().result()
+            if found is not None:
+                return result(found)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)